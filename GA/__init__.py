@@ -1,2 +1,6 @@
 from .chromosome import *
-from .population import *
\ No newline at end of file
+from .adaptive_de import *
+from .population import *
+from .array_population import *
+from .multi_run import *
+from .islands import *
@@ -0,0 +1,144 @@
+import numpy as np
+
+
+class JDEParameters:
+    """
+    Per-individual F and CR of jDE (Brest et al., 2006). Every generation each trial vector gets a new F with probability
+    tau_F and a new CR with probability tau_CR, otherwise it inherits those of its parent. The values are kept only if the
+    trial vector survives.
+
+    Parameters:
+    - pop_size (int): initial number of individuals
+    - F_lower, F_upper (float): new F values are drawn uniformly from [F_lower, F_lower + F_upper]
+    - tau_F, tau_CR (float): probabilities of drawing a new F and a new CR
+    """
+    def __init__(self, pop_size, F_init=0.5, CR_init=0.9, F_lower=0.1, F_upper=0.9, tau_F=0.1, tau_CR=0.1):
+        self.F = np.full(pop_size, F_init)
+        self.CR = np.full(pop_size, CR_init)
+        self.F_lower = F_lower
+        self.F_upper = F_upper
+        self.tau_F = tau_F
+        self.tau_CR = tau_CR
+
+    def sample(self, rng):
+        """
+        Returns the (F, CR) vectors of the trial vectors, the uniform numbers are drawn from rng in one block
+        """
+        n = len(self.F)
+        u = rng.random((4, n))
+        F = np.where(u[0] < self.tau_F, self.F_lower + u[1] * self.F_upper, self.F)
+        CR = np.where(u[2] < self.tau_CR, u[3], self.CR)
+        return F, CR
+
+    def get_state(self):
+        return {"F": self.F, "CR": self.CR}
+
+    def set_state(self, state):
+        self.F = state["F"].copy()
+        self.CR = state["CR"].copy()
+
+
+class SuccessHistory:
+    """
+    Success-history memory of SHADE (Tanabe and Fukunaga, 2013). F is drawn from a Cauchy distribution and CR from a
+    normal distribution around a randomly chosen memory slot; after every generation one slot is overwritten, in turn,
+    with the weighted Lehmer mean of the successful F values and the weighted mean of the successful CR values.
+
+    Parameters:
+    - memory_size (int): number of slots H
+    """
+    def __init__(self, memory_size=6, F_init=0.5, CR_init=0.5):
+        self.memory_F = np.full(memory_size, F_init)
+        self.memory_CR = np.full(memory_size, CR_init)
+        self.k = 0 # next slot to overwrite
+
+    def sample(self, n, rng):
+        """
+        Returns n (F, CR) values drawn from rng, F in (0, 1] and CR in [0, 1]
+        """
+        slots = rng.integers(0, len(self.memory_F), size=n)
+        CR = np.clip(rng.normal(self.memory_CR[slots], 0.1), 0, 1)
+        F = self.memory_F[slots] + 0.1 * np.tan(np.pi * (rng.random(n) - 0.5))
+        redraw = F <= 0
+        while np.any(redraw): # non-positive F values are drawn again
+            F[redraw] = self.memory_F[slots[redraw]] + 0.1 * np.tan(np.pi * (rng.random(np.count_nonzero(redraw)) - 0.5))
+            redraw = F <= 0
+        return np.minimum(F, 1), CR
+
+    def update(self, F, CR, improvement):
+        """
+        Stores the weighted means of the successful F and CR values, weighted by their improvement
+
+        Parameters:
+        - F, CR (np.ndarray): parameters of the successful trial vectors
+        - improvement (np.ndarray): how much each successful trial vector improved on its parent
+        """
+        if len(F) == 0:
+            return
+        total = np.sum(improvement)
+        weights = improvement / total if total > 0 else np.full(len(F), 1 / len(F))
+        self.memory_F[self.k] = np.sum(weights * F ** 2) / np.sum(weights * F)
+        self.memory_CR[self.k] = np.sum(weights * CR)
+        self.k = (self.k + 1) % len(self.memory_F)
+
+    def get_state(self):
+        return {"memory_F": self.memory_F, "memory_CR": self.memory_CR, "k": np.array(self.k)}
+
+    def set_state(self, state):
+        self.memory_F = state["memory_F"].copy()
+        self.memory_CR = state["memory_CR"].copy()
+        self.k = int(state["k"])
+
+
+class Archive:
+    """
+    External archive of parents replaced by better trial vectors, used as a source of difference vectors by
+    current-to-pbest/1. When it exceeds its size, randomly chosen entries are removed.
+    """
+    def __init__(self, n_var, max_size):
+        self.genes = np.empty((0, n_var))
+        self.max_size = max_size
+
+    def __len__(self):
+        return len(self.genes)
+
+    def add(self, genes, rng):
+        self.genes = np.concatenate((self.genes, genes))
+        self.resize(self.max_size, rng)
+
+    def resize(self, max_size, rng):
+        self.max_size = max_size
+        if len(self.genes) > max_size:
+            keep = np.sort(rng.choice(len(self.genes), max_size, replace=False))
+            self.genes = self.genes[keep]
+
+    def get_state(self):
+        return {"genes": self.genes, "max_size": np.array(self.max_size)}
+
+    def set_state(self, state):
+        self.genes = state["genes"].copy()
+        self.max_size = int(state["max_size"])
+
+
+def distinct_indices(n, pool_sizes, rng):
+    """
+    For every individual i in range(n), draws one index per entry of pool_sizes, the j-th one in range(pool_sizes[j]),
+    all different from i and from each other (the usual r1 != r2 != r3 != i of DE mutation strategies)
+    """
+    idxs = np.arange(n)
+    drawn = []
+    for pool_size in pool_sizes:
+        r = rng.integers(0, pool_size, size=n)
+        invalid = (r == idxs) | np.any([r == previous for previous in drawn], axis=0) if drawn else r == idxs
+        while np.any(invalid):
+            r[invalid] = rng.integers(0, pool_size, size=np.count_nonzero(invalid))
+            invalid = (r == idxs) | np.any([r == previous for previous in drawn], axis=0) if drawn else r == idxs
+        drawn.append(r)
+    return drawn
+
+def midpoint_bounds(donor_genes, genes, xmin, xmax):
+    """
+    Bound handling of SHADE: a component outside the bounds is set halfway between the bound and the parent's component
+    """
+    donor_genes = np.where(donor_genes < xmin, (xmin + genes) / 2, donor_genes)
+    return np.where(donor_genes > xmax, (xmax + genes) / 2, donor_genes)
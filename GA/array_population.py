@@ -0,0 +1,211 @@
+import numpy as np
+from utils import *
+from Problems import *
+from GA import *
+
+
+class ArrayPopulation(Population):
+    """
+    Structure-of-arrays population: genes are kept in one contiguous (pop_size, nvar) float array with parallel vectors for
+    objective value, raw constraint values, fitness and penalties, instead of an array of Chromosome objects.
+
+    It reads the same config files and supports the same evolve("GA" | "DE" | "DE+SR") selections as Population.
+    Chromosome views are only created on demand (best_chromosome, get_chromosome).
+
+    Parameters:
+    - genes (np.ndarray): optional (pop_size, nvar) initial genes, sampled uniformly within bounds if not given
+    """
+    def __init__(self, objective_function, penalty = True, n_var=None, t=None, config_file=None, genes=None, stopping_criteria=None, seed=None):
+        super().__init__(objective_function, penalty=penalty, n_var=n_var, t=t, config_file=config_file, chromosomes=genes,
+                         stopping_criteria=stopping_criteria, seed=seed)
+
+    def initialize_population(self, genes=None):
+        if genes is None:
+            xmin = self.objective_function.get_xmin()
+            xmax = self.objective_function.get_xmax()
+            genes = self.rng.uniform(xmin, xmax, size=(self.pop_size, self.objective_function.get_nvar()))
+        self.set_population(*self.evaluate(self.apply_bounds(genes)))
+
+    def apply_bounds(self, genes):
+        return np.clip(genes, self.objective_function.get_xmin(), self.objective_function.get_xmax())
+
+    def evaluate(self, genes):
+        """
+        Evaluates a (n, nvar) gene array in a single batched call, returns (genes, objective_values, constraint_values)
+        """
+        objective_values, constraint_values = self.objective_function.evaluate_raw_batch(genes)
+        return genes, objective_values, constraint_values
+
+    def set_population(self, genes, objective_values, constraint_values):
+        self.genes = np.ascontiguousarray(genes, dtype=float)
+        self.objective_values = objective_values
+        self.constraint_values = constraint_values
+        self.rescore()
+
+    def get_raw_values(self):
+        return self.objective_values, self.constraint_values
+
+    def rescore(self):
+        """
+        Re-applies the current penalty schedule to the stored raw values of the whole population
+        """
+        self.weighted_penalty, self.unweighted_penalty, self.num_violations = self.objective_function.penalty_from_constraints(self.constraint_values)
+        if self.penalty:
+            self.fitness = self.objective_values + self.weighted_penalty
+        else:
+            self.fitness = self.objective_values
+        self.constraint_violation = self.unweighted_penalty if self.constraint_handling.lexicographic else self.weighted_penalty
+
+    def select(self, indices):
+        """
+        Keeps the individuals at the given indices (repetitions allowed), in that order
+        """
+        self.genes = self.genes[indices]
+        self.objective_values = self.objective_values[indices]
+        self.constraint_values = self.constraint_values[indices]
+        self.fitness = self.fitness[indices]
+        self.constraint_violation = self.constraint_violation[indices]
+        self.weighted_penalty = self.weighted_penalty[indices]
+        self.unweighted_penalty = self.unweighted_penalty[indices]
+        self.num_violations = self.num_violations[indices]
+
+    def get_genes(self):
+        return self.genes
+
+    def get_fitness(self):
+        return self.fitness
+
+    def get_num_violations(self):
+        return self.num_violations
+
+    def get_constraint_violation(self):
+        return self.constraint_violation
+
+    def get_migrants(self, k):
+        best = self.migration_order()[:k]
+        return {
+            "genes": self.genes[best],
+            "objective_values": self.objective_values[best],
+            "constraint_values": self.constraint_values[best],
+            "fitness": self.fitness[best],
+            "constraint_violation": self.constraint_violation[best]
+        }
+
+    def accept_migrants(self, migrants):
+        worst = self.migration_order()[::-1][:len(migrants["genes"])]
+        genes, objective_values, constraint_values = self.genes.copy(), self.objective_values.copy(), self.constraint_values.copy()
+        genes[worst] = migrants["genes"]
+        objective_values[worst] = migrants["objective_values"]
+        constraint_values[worst] = migrants["constraint_values"]
+        self.set_population(genes, objective_values, constraint_values)
+        self.update_best()
+
+    def get_chromosome(self, index):
+        """
+        Returns a Chromosome view of one row, built from the stored values without evaluating again
+        """
+        chromo = Chromosome(self.objective_function, penalty=self.penalty, genes=self.genes[index].copy(), rng=self.rng,
+                            objective_value=self.objective_values[index], constraint_values=self.constraint_values[index])
+        chromo.set_constraint_violation(self.constraint_violation[index]) # sum of violations with the feasibility rules
+        return chromo
+
+    @property
+    def chromosomes(self):
+        return np.array([self.get_chromosome(i) for i in range(len(self.genes))])
+
+    @property
+    def best_chromosome(self):
+        return self.get_chromosome(self.best_index)
+
+    def update_best(self):
+        self.best_index = self.constraint_handling.best(self.fitness, self.constraint_violation)
+
+    def random_selection(self, with_replacement=False):
+        self.select(self.rng.choice(self.pop_size, size=self.pop_size, replace=with_replacement))
+
+    def tournament_selection(self, q=2, p=0):
+        winners = []
+        selection_values = self.constraint_handling.selection_values(self.fitness, self.constraint_violation)
+
+        while len(winners) < self.pop_size:
+            shuffled_indices = self.rng.permutation(self.pop_size)
+            reshaped_indices = shuffled_indices[:len(shuffled_indices) - len(shuffled_indices) % q].reshape(-1, q)
+
+            best_in_group = np.argmin(selection_values[reshaped_indices], axis=1)
+
+            alternative_indices = self.rng.integers(0, q, size=best_in_group.shape)
+            flip_decision = self.rng.random(best_in_group.size) < p
+            selected_indices = np.where(flip_decision, alternative_indices, best_in_group)
+
+            winners.extend(reshaped_indices[np.arange(len(selected_indices)), selected_indices])
+
+        self.select(np.array(winners[:self.pop_size]))
+
+    def roulette_wheel_selection(self, replace=True):
+        fitness_values = self.constraint_handling.selection_values(self.fitness, self.constraint_violation)
+
+        if np.min(fitness_values) < 0:
+            fitness_values = fitness_values + np.abs(np.min(fitness_values))
+
+        inverted_fitness_values = np.max(fitness_values) - fitness_values
+        total_fitness = np.sum(inverted_fitness_values)
+
+        if total_fitness == 0:
+            probabilities = np.ones(self.pop_size) / self.pop_size
+        else:
+            probabilities = inverted_fitness_values / total_fitness
+
+        self.select(self.rng.choice(self.pop_size, size=self.pop_size, replace=replace, p=probabilities))
+
+    def parent_vs_child_selection(self, offspring_population):
+        """
+        Parameters:
+        - offspring_population (tuple): (genes, objective_values, constraint_values) of the offspring
+        """
+        genes, objective_values, constraint_values = offspring_population
+        child_fitness, child_constraint_violation = self.score(objective_values, constraint_values)
+        mask = self.constraint_handling.less_equal(self.fitness, self.constraint_violation, child_fitness, child_constraint_violation)
+        self.set_population(np.where(mask[:, None], self.genes, genes),
+                            np.where(mask, self.objective_values, objective_values),
+                            np.where(mask[:, None], self.constraint_values, constraint_values))
+
+    def differential_evolution(self, num_difference_vectors):
+        """
+        Returns the (pop_size, nvar) trial genes, they are not evaluated since crossover replaces them
+        """
+        return self.difference_vectors(self.genes, num_difference_vectors)
+
+    def binomial_crossover(self, binary=False):
+        """
+        Returns the evaluated offspring of binomial or binary crossover between the population and its trial genes
+        """
+        trial_genes = self.differential_evolution(self.num_difference_vectors)
+        mask = functions.crossover_mask(self.pop_size, self.objective_function.get_nvar(), self.crossover_rate, binary, rng=self.rng)
+
+        return self.evaluate(np.where(mask, trial_genes, self.genes))
+
+    def stochastic_ranking(self, binary=False, Pf=0.45):
+        if self.penalty:
+            raise ValueError("Cannot perform Stochastic Ranking if penalty is included in fitness")
+
+        genes, objective_values, constraint_values = self.binomial_crossover(binary)
+        fitness, constraint_violation = self.score(objective_values, constraint_values)
+
+        ranked_indices = functions.stochastic_ranking_indices(np.concatenate((self.fitness, fitness)),
+                                                              np.concatenate((self.constraint_violation, constraint_violation)), Pf, rng=self.rng)
+        survivors = ranked_indices[:self.pop_size]
+
+        self.set_population(np.concatenate((self.genes, genes))[survivors],
+                            np.concatenate((self.objective_values, objective_values))[survivors],
+                            np.concatenate((self.constraint_values, constraint_values))[survivors])
+
+    def sbx_and_pbm(self):
+        """
+        Apply SBX (Simulated Binary Crossover) and PBM (Parameter-Based Mutation) across the population, the offspring are
+        evaluated once in a single batched call.
+        """
+        self.select(self.rng.permutation(self.pop_size))
+        offspring_genes = functions.sbx_and_pbm(self.genes, self.objective_function.get_xmin(), self.objective_function.get_xmax(),
+                                                self.generation_t, self.crossover_rate, per_gene_spread=self.per_gene_spread, rng=self.rng)
+
+        self.set_population(*self.evaluate(offspring_genes))
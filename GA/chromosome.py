@@ -1,4 +1,3 @@
-import random
 import sympy as sp
 import numpy as np
 from utils import *
@@ -6,33 +5,101 @@ from utils import *
 class Chromosome:
     """
     Class for representing a real-encoded solution in the population.
+
+    Fitness is evaluated lazily: it is computed on first access and invalidated whenever genes are reassigned, so genes
+    and fitness always match. In-place edits of the genes array must be followed by invalidate().
+
+    Random genes and the operators draw from rng, the np.random.Generator of the owning population (required, so no
+    individual silently draws from fresh OS entropy); offspring share it.
     """
-    def __init__(self, objective_function, penalty = True, genes = None):
+    def __init__(self, objective_function, penalty = True, genes = None, objective_value = None, constraint_values = None, *, rng):
         self.__obj_func_singleton = objective_function
-        self.genes = genes if genes is not None else self.initialize_genes()
-        self.apply_bounds()
         self.penalty = penalty
+        self.rng = np.random.default_rng(rng)
         self.n = objective_function.get_nvar()
-        self.calculate_fitness()
+        self.n_evaluations = 0 # times this individual has been evaluated
+        self.genes = genes if genes is not None else self.initialize_genes()
+        self.apply_bounds()
+        if objective_value is not None: # already evaluated elsewhere (e.g. a view of an ArrayPopulation row)
+            self.set_raw_values(objective_value, constraint_values)
+
+    @property
+    def genes(self):
+        return self._genes
+
+    @genes.setter
+    def genes(self, genes):
+        self._genes = genes
+        self.invalidate()
+
+    def invalidate(self):
+        self.dirty = True
+
+    @property
+    def objective_value(self):
+        if self.dirty:
+            self.calculate_fitness()
+        return self._objective_value
+
+    @property
+    def constraint_values(self):
+        if self.dirty:
+            self.calculate_fitness()
+        return self._constraint_values
+
+    @property
+    def fitness(self):
+        if self.dirty:
+            self.calculate_fitness()
+        return self._fitness
+
+    @property
+    def constraint_violation(self):
+        if self.dirty:
+            self.calculate_fitness()
+        return self._constraint_violation
 
     def initialize_genes(self):
         xmin = self.__obj_func_singleton.get_xmin()
         xmax = self.__obj_func_singleton.get_xmax()
-        return np.array([np.random.uniform(low, high) for low, high in zip(xmin, xmax)])
+        return self.rng.uniform(xmin, xmax)
     
     def calculate_fitness(self):
-        weighted_penalty, unweighted_penalty, _ = self.__obj_func_singleton.evaluate_penalty(self.genes)
+        """
+        Evaluates the raw objective value and raw constraint values once, then scores them with the current penalty schedule
+        """
+        objective_value, constraint_values = self.__obj_func_singleton.evaluate_raw(self.genes)
+        self.n_evaluations += 1
+        self.set_raw_values(objective_value, constraint_values)
+
+    def set_raw_values(self, objective_value, constraint_values):
+        """
+        Stores raw values evaluated elsewhere (e.g. in a batched call) and scores them with the current penalty schedule
+        """
+        self._objective_value = objective_value
+        self._constraint_values = constraint_values
+        self.dirty = False
+        weighted_penalty, _, _ = self.__obj_func_singleton.penalty_from_constraints(constraint_values)
+        self.set_constraint_violation(weighted_penalty[0])
+
+    def set_constraint_violation(self, constraint_violation):
+        """
+        Updates fitness and constraint_violation from the stored objective value, without re-evaluating. constraint_violation
+        is the weighted penalty, or the sum of violations when the population compares by feasibility (see Population.score)
+        """
         if self.penalty: # penalty is included in fitness
-            self.fitness = self.__obj_func_singleton.evaluate(self.genes) + weighted_penalty
-        else: # fitness does not include penalty (for stochastic ranking)
-            self.fitness = self.__obj_func_singleton.evaluate(self.genes)
-            self.constraint_violation = weighted_penalty
+            self._fitness = self._objective_value + constraint_violation
+        else: # fitness does not include penalty (for stochastic ranking and feasibility rules)
+            self._fitness = self._objective_value
+        self._constraint_violation = constraint_violation
 
     def return_fitness(self):
-        fitness = self.__obj_func_singleton.evaluate(self.genes)
-        weighted_penalty, unweighted_penalty, num_violations = self.__obj_func_singleton.evaluate_penalty(self.genes)
+        """
+        Returns objective value, weighted penalty, unweighted penalty and number of violations under the current penalty schedule
+        """
+        weighted_penalty, unweighted_penalty, num_violations = self.__obj_func_singleton.penalty_from_constraints(self.constraint_values)
 
-        return fitness, weighted_penalty, unweighted_penalty, num_violations
+        return self.objective_value, weighted_penalty[0], unweighted_penalty[0], num_violations[0]
 
     def apply_bounds(self):
         xmin = self.__obj_func_singleton.get_xmin()
@@ -40,23 +107,22 @@ class Chromosome:
         self.genes = np.clip(self.genes, xmin, xmax)
 
     def binomial_crossover(self, trial, binary = False, crossover_rate=0.8): # Binomial or Binary crossover
-        J = functions.set_J(self.n, binary, crossover_rate)
-        offspring = Chromosome(self.__obj_func_singleton, penalty = self.penalty, genes=self.genes.copy())
-        for j in J:
-            offspring.genes[j] = trial.genes[j]
-        offspring.calculate_fitness()
+        J = functions.set_J(self.n, crossover_rate, binary, rng=self.rng)
+        genes = self.genes.copy()
+        genes[J] = trial.genes[J]
         
-        return offspring
+        return Chromosome(self.__obj_func_singleton, penalty = self.penalty, genes=genes, rng=self.rng)
 
     def sbx(self, other, u = None, nc = 2):
-        b = functions.spread_factor(u, nc)
+        b = functions.spread_factor(u, nc, rng=self.rng)
         parent1 = self.genes
         parent2 = other.genes
 
         child1 = 0.5 * ((parent1 + parent2) - b * (parent2 - parent1)) 
         child2 = 0.5 * ((parent1 + parent2) + b * (parent2 - parent1))
 
-        return Chromosome(self.__obj_func_singleton, genes=child1), Chromosome(self.__obj_func_singleton, genes=child2) 
+        return (Chromosome(self.__obj_func_singleton, penalty=self.penalty, genes=child1, rng=self.rng),
+                Chromosome(self.__obj_func_singleton, penalty=self.penalty, genes=child2, rng=self.rng))
 
     def parameter_based_mutation(self, t=1):
         y = self.genes
@@ -65,6 +131,5 @@ class Chromosome:
         eta_m = 100 + t
         delta_max = y_u - y_l
         delta = np.minimum(y - y_l, y_u - y) / delta_max
-        beta_q = functions.beta_q_factor(delta=delta, eta_m=eta_m)
-        self.genes = y + beta_q * delta_max
-        self.calculate_fitness()
\ No newline at end of file
+        beta_q = functions.beta_q_factor(delta=delta, eta_m=eta_m, rng=self.rng)
+        self.genes = y + beta_q * delta_max
\ No newline at end of file
@@ -0,0 +1,208 @@
+import configparser
+import multiprocessing
+import traceback
+import numpy as np
+from GA import *
+
+
+def _island_worker(connection, population_class, population_args, algorithm_selection, seed):
+    """
+    Runs one island in its own process. Commands received through the pipe:
+    - ("evolve", n): runs up to n generations and replies with the island status and its migrants
+    - ("immigrate", migrants): replaces the worst individuals by the migrants
+    - ("finish", None): replies with the final results and exits
+    An exception is sent back as {"error": traceback} before the worker exits, and raised again by the driver.
+    """
+    try:
+        _run_island(connection, population_class, population_args, algorithm_selection, seed)
+    except Exception:
+        connection.send({"error": traceback.format_exc()})
+        connection.close()
+
+
+def _run_island(connection, population_class, population_args, algorithm_selection, seed):
+    population = population_class(**population_args, seed=seed)
+    population.stopping_criteria.start()
+    population.stop_reason = None
+
+    while True:
+        command, payload = connection.recv()
+        if command == "evolve":
+            n_generations, k = payload
+            for _ in range(n_generations):
+                if population.generation_t >= population.max_generations:
+                    population.stop_reason = population.stop_reason or "max_generations"
+                if population.stop_reason is not None:
+                    break
+                population.step(algorithm_selection)
+                population.stop_reason = population.check_stopping_criteria()
+                if population.stop_reason is None:
+                    population.check_restart()
+            if population.stop_reason is None and population.generation_t >= population.max_generations:
+                population.stop_reason = "max_generations"
+            connection.send({
+                "done": population.stop_reason is not None,
+                "migrants": population.get_migrants(k)
+            })
+        elif command == "immigrate":
+            population.accept_migrants(payload)
+        elif command == "finish":
+            population.generation_statistics.stop_reason = population.stop_reason
+            best = population.get_migrants(1)
+            connection.send({
+                "generation_statistics": population.generation_statistics,
+                "best": {key: value[0] for key, value in best.items()},
+                "evaluations": population.objective_function.evaluation_count
+            })
+            connection.close()
+            return
+
+
+def _receive(connection, index):
+    """
+    Returns the next reply of island index, raising the island's exception if it failed
+    """
+    try:
+        reply = connection.recv()
+    except EOFError:
+        raise RuntimeError(f"Island {index} exited without replying") from None
+    if "error" in reply:
+        raise RuntimeError(f"Island {index} failed:\n{reply['error']}")
+    return reply
+
+def _send(connection, index, command):
+    try:
+        connection.send(command)
+    except (BrokenPipeError, ConnectionResetError): # the island exited, its error is still waiting in the pipe
+        _receive(connection, index)
+        raise
+
+
+class IslandModel:
+    """
+    Island-model driver: N populations (GA, DE or DE+SR) evolve in separate processes and every migration_interval
+    generations each island sends its best migration_size individuals to its neighbours, which replace their worst ones.
+    Migrants travel as compact arrays of genes and raw objective/constraint values.
+
+    Settings are read from the optional [IslandSettings] section of the config file, keyword arguments override them:
+    - n_islands (int): number of islands (processes)
+    - migration_interval (int): generations between migrations
+    - migration_size (int): number of migrants k sent by each island
+    - topology (str): "ring" (island i sends to island i+1) or "fully_connected" (every island receives the best k of
+                      all the other islands' migrants)
+
+    Parameters:
+    - objective_function (str): name of the problem in Problems/problems.py
+    - algorithm_selection (str): "GA", "DE" or "DE+SR"
+    - population_class: Population or ArrayPopulation
+    - seed (int): seed of the whole run, every island gets its own np.random.SeedSequence spawned from it
+    """
+    def __init__(self, objective_function, algorithm_selection, config_file=None, penalty=True, n_var=None,
+                 population_class=ArrayPopulation, seed=None, **island_settings):
+        self.objective_function = objective_function
+        self.algorithm_selection = algorithm_selection
+        self.config_file = config_file
+        self.penalty = penalty
+        self.n_var = n_var
+        self.population_class = population_class
+        self.seed = seed
+        self.load_config(config_file)
+        for key, value in island_settings.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Unknown island setting {key}")
+            setattr(self, key, value)
+        if self.topology not in ("ring", "fully_connected"):
+            raise ValueError("topology should be either 'ring' or 'fully_connected'")
+        self.island_statistics = []
+
+    def load_config(self, config_file):
+        config = configparser.ConfigParser()
+        config.read(config_file)
+        self.n_islands = config.getint('IslandSettings', 'n_islands', fallback=multiprocessing.cpu_count())
+        self.migration_interval = config.getint('IslandSettings', 'migration_interval', fallback=10)
+        self.migration_size = config.getint('IslandSettings', 'migration_size', fallback=2)
+        self.topology = config.get('IslandSettings', 'topology', fallback='ring')
+        # islands compare by fitness or by feasibility rules like their populations, see [ConstraintSettings]
+        self.constraint_handling = constraint_handling.ConstraintHandling.from_config(config)
+
+    def order(self, fitness, constraint_violation):
+        """
+        Indices of the individuals from best to worst: by the feasibility rules of [ConstraintSettings], by fitness when
+        it includes the penalty, or by constraint violation first and fitness second otherwise (stochastic ranking)
+        """
+        if self.constraint_handling.lexicographic:
+            return self.constraint_handling.order(fitness, constraint_violation)
+        if self.penalty:
+            return np.argsort(fitness, kind='stable')
+        return np.lexsort((fitness, constraint_violation))
+
+    def incoming_migrants(self, migrants):
+        """
+        Returns, for every island, the migrants it receives according to the topology
+        """
+        if self.topology == "ring":
+            return [migrants[(i - 1) % self.n_islands] for i in range(self.n_islands)]
+
+        incoming = []
+        for i in range(self.n_islands):
+            others = [migrants[j] for j in range(self.n_islands) if j != i]
+            pool = {key: np.concatenate([m[key] for m in others]) for key in others[0]}
+            best = self.order(pool["fitness"], pool["constraint_violation"])[:self.migration_size]
+            incoming.append({key: value[best] for key, value in pool.items()})
+        return incoming
+
+    def run(self):
+        """
+        Evolves all islands until every one of them reaches max_generations or a stopping criterion. Returns the best
+        genes found across islands.
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(self.n_islands)
+        population_args = {"objective_function": self.objective_function, "penalty": self.penalty, "n_var": self.n_var,
+                           "config_file": self.config_file}
+        context = multiprocessing.get_context()
+        connections, processes = [], []
+        for i in range(self.n_islands):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=_island_worker,
+                                      args=(child_connection, self.population_class, population_args, self.algorithm_selection, seeds[i]))
+            process.start()
+            child_connection.close() # the parent only keeps its end, so recv raises EOFError if the island dies
+            connections.append(parent_connection)
+            processes.append(process)
+
+        try:
+            while True:
+                for i, connection in enumerate(connections):
+                    _send(connection, i, ("evolve", (self.migration_interval, self.migration_size)))
+                replies = [_receive(connection, i) for i, connection in enumerate(connections)]
+                if all(reply["done"] for reply in replies):
+                    break
+                incoming = self.incoming_migrants([reply["migrants"] for reply in replies])
+                for i, (connection, migrants) in enumerate(zip(connections, incoming)):
+                    _send(connection, i, ("immigrate", migrants))
+
+            for i, connection in enumerate(connections):
+                _send(connection, i, ("finish", None))
+            results = [_receive(connection, i) for i, connection in enumerate(connections)]
+        except BaseException:
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+
+        self.island_statistics = [result["generation_statistics"] for result in results]
+        self.evaluations = sum(result["evaluations"] for result in results)
+        best = {key: np.array([result["best"][key] for result in results]) for key in results[0]["best"]}
+        self.best_island = int(self.order(best["fitness"], best["constraint_violation"])[0])
+        self.best_genes = best["genes"][self.best_island]
+        self.best_fitness = best["fitness"][self.best_island]
+        self.best_objective_value = best["objective_values"][self.best_island]
+        return self.best_genes
+
+    def get_population_statistics(self):
+        """
+        Returns the GenerationStatistics of the island holding the best individual
+        """
+        return self.island_statistics[self.best_island]
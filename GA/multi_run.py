@@ -0,0 +1,355 @@
+import copy
+import numpy as np
+from utils import *
+from Problems import *
+from GA import *
+
+
+class MultiRunPopulation(Population):
+    """
+    Advances n_runs independent runs of the same problem and algorithm together, as (n_runs, pop_size, nvar) gene arrays
+    with (n_runs, pop_size) objective values, fitness and penalties.
+
+    Every run draws from its own np.random.Generator seeded with its seed, in the same order as a Population or
+    ArrayPopulation created with seed=seed, so the statistics of each run are identical to those of the separate
+    runs. Only the random draws are done run by run; selection, variation, evaluation (a single batched call for all the
+    runs), penalties and statistics are vectorized across the run axis.
+
+    Supports the GA, DE and DE+SR selections. A run that meets one of the stopping criteria is frozen while the others
+    continue. Migration and restarts ([RestartSettings]) are not supported.
+
+    Parameters:
+    - seeds (list): one seed (int or np.random.SeedSequence) per run
+    """
+    def __init__(self, objective_function, seeds, penalty = True, n_var=None, t=None, config_file=None, stopping_criteria=None):
+        self.seeds = list(seeds)
+        self.n_runs = len(self.seeds)
+        self.rngs = [np.random.default_rng(seed) for seed in self.seeds]
+        self.evaluation_counts = np.zeros(self.n_runs, dtype=np.int64) # individuals evaluated by each run
+        super().__init__(objective_function, penalty=penalty, n_var=n_var, t=t, config_file=config_file, stopping_criteria=stopping_criteria)
+        self.generation_statistics = [statistics.GenerationStatistics(self.statistics_fields, self.max_generations, self.statistics_ring_size)
+                                      for _ in range(self.n_runs)]
+        self.run_stopping_criteria = [copy.deepcopy(self.stopping_criteria) for _ in range(self.n_runs)]
+        self.stop_reasons = [None] * self.n_runs
+        self.active = np.ones(self.n_runs, dtype=bool)
+
+    def initialize_population(self, genes=None):
+        xmin = self.objective_function.get_xmin()
+        xmax = self.objective_function.get_xmax()
+        if genes is None:
+            size = (self.pop_size, self.objective_function.get_nvar())
+            genes = np.stack([rng.uniform(xmin, xmax, size=size) for rng in self.rngs])
+        genes = np.ascontiguousarray(np.clip(genes, xmin, xmax), dtype=float)
+        runs = np.arange(self.n_runs)
+        objective_values, constraint_values = self.evaluate(runs, genes)
+
+        self.genes = genes
+        self.objective_values = objective_values
+        self.constraint_values = constraint_values
+        self.fitness = np.empty(objective_values.shape)
+        self.constraint_violation = np.empty(objective_values.shape)
+        self.num_violations = np.empty(objective_values.shape, dtype=np.int64)
+        self.rescore(runs)
+
+    def evaluate(self, runs, genes):
+        """
+        Evaluates the (len(runs), pop_size, nvar) genes of the given runs in a single batched call, returns
+        (objective_values, constraint_values)
+        """
+        n_runs, pop_size, nvar = genes.shape
+        objective_values, constraint_values = self.objective_function.evaluate_raw_batch(genes.reshape(n_runs * pop_size, nvar))
+        self.evaluation_counts[runs] += pop_size
+        return objective_values.reshape(n_runs, pop_size), constraint_values.reshape(n_runs, pop_size, constraint_values.shape[1])
+
+    def score(self, objective_values, constraint_values):
+        n_runs, pop_size, n_constraints = constraint_values.shape
+        fitness, constraint_violation = super().score(objective_values.reshape(-1), constraint_values.reshape(n_runs * pop_size, n_constraints))
+        return fitness.reshape(n_runs, pop_size), constraint_violation.reshape(n_runs, pop_size)
+
+    def rescore(self, runs=None):
+        """
+        Re-applies the current penalty schedule to the stored raw values of the given runs (the active ones by default)
+        """
+        runs = np.flatnonzero(self.active) if runs is None else runs
+        constraint_values = self.constraint_values[runs]
+        n_runs, pop_size, n_constraints = constraint_values.shape
+        weighted_penalty, unweighted_penalty, num_violations = self.objective_function.penalty_from_constraints(constraint_values.reshape(n_runs * pop_size, n_constraints))
+        weighted_penalty = weighted_penalty.reshape(n_runs, pop_size)
+        if self.penalty:
+            self.fitness[runs] = self.objective_values[runs] + weighted_penalty
+        else:
+            self.fitness[runs] = self.objective_values[runs]
+        if self.constraint_handling.lexicographic:
+            self.constraint_violation[runs] = unweighted_penalty.reshape(n_runs, pop_size)
+        else:
+            self.constraint_violation[runs] = weighted_penalty
+        self.num_violations[runs] = num_violations.reshape(n_runs, pop_size)
+
+    def set_runs(self, runs, genes, objective_values, constraint_values):
+        self.genes[runs] = genes
+        self.objective_values[runs] = objective_values
+        self.constraint_values[runs] = constraint_values
+        self.rescore(runs)
+
+    def select(self, runs, indices):
+        """
+        Keeps, in every given run, the individuals at the given (len(runs), pop_size) indices
+        """
+        self.genes[runs] = np.take_along_axis(self.genes[runs], indices[:, :, None], axis=1)
+        self.objective_values[runs] = np.take_along_axis(self.objective_values[runs], indices, axis=1)
+        self.constraint_values[runs] = np.take_along_axis(self.constraint_values[runs], indices[:, :, None], axis=1)
+        self.fitness[runs] = np.take_along_axis(self.fitness[runs], indices, axis=1)
+        self.constraint_violation[runs] = np.take_along_axis(self.constraint_violation[runs], indices, axis=1)
+        self.num_violations[runs] = np.take_along_axis(self.num_violations[runs], indices, axis=1)
+
+    def get_genes(self):
+        return self.genes
+
+    def get_fitness(self):
+        return self.fitness
+
+    def get_num_violations(self):
+        return self.num_violations
+
+    def get_constraint_violation(self):
+        return self.constraint_violation
+
+    def get_raw_values(self):
+        return self.objective_values, self.constraint_values
+
+    def comparison_violation(self, runs, constraint_violation):
+        """
+        Violations of the given runs as the feasibility rules compare them, every run has its own epsilon level
+        """
+        if self.constraint_handling.method == "epsilon":
+            return functions.epsilon_violation(constraint_violation, self.constraint_handling.epsilon[runs, None])
+        return constraint_violation
+
+    def best_indices(self, runs):
+        """
+        Index of the best individual of every given run
+        """
+        if self.constraint_handling.lexicographic:
+            return functions.lexicographic_order(self.fitness[runs], self.comparison_violation(runs, self.constraint_violation[runs]))[:, 0]
+        return np.argmin(self.fitness[runs], axis=1)
+
+    def update_best(self):
+        self.best_index = self.best_indices(np.arange(self.n_runs))
+
+    @property
+    def best_genes(self):
+        """
+        (n_runs, nvar) genes of the best individual of every run
+        """
+        return self.genes[np.arange(self.n_runs), self.best_index]
+
+    def roulette_wheel_selection(self, runs):
+        fitness_values = self.fitness[runs]
+        if self.constraint_handling.lexicographic:
+            fitness_values = functions.lexicographic_ranks(fitness_values, self.comparison_violation(runs, self.constraint_violation[runs]))
+        minimum = np.min(fitness_values, axis=1, keepdims=True)
+        fitness_values = np.where(minimum < 0, fitness_values + np.abs(minimum), fitness_values)
+
+        inverted_fitness_values = np.max(fitness_values, axis=1, keepdims=True) - fitness_values
+        total_fitness = np.sum(inverted_fitness_values, axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            probabilities = np.where(total_fitness == 0, 1 / self.pop_size, inverted_fitness_values / total_fitness)
+
+        self.select(runs, np.stack([self.rngs[run].choice(self.pop_size, size=self.pop_size, replace=True, p=probabilities[i])
+                                    for i, run in enumerate(runs)]))
+
+    def sbx_and_pbm(self, runs):
+        self.select(runs, np.stack([self.rngs[run].permutation(self.pop_size) for run in runs]))
+
+        draws = [functions.sbx_and_pbm_random_numbers(self.pop_size, self.objective_function.get_nvar(), self.per_gene_spread, self.rngs[run])
+                 for run in runs]
+        offspring_genes = functions.sbx_and_pbm(self.genes[runs], self.objective_function.get_xmin(), self.objective_function.get_xmax(),
+                                                self.generation_t, self.crossover_rate, per_gene_spread=self.per_gene_spread,
+                                                random_numbers=tuple(np.stack(draw) for draw in zip(*draws)))
+
+        self.set_runs(runs, offspring_genes, *self.evaluate(runs, offspring_genes))
+
+    def binomial_crossover(self, runs, binary=False):
+        """
+        Returns the evaluated (genes, objective_values, constraint_values) offspring of DE mutation and binomial or binary
+        crossover in the given runs
+        """
+        genes = self.genes[runs]
+        trial_genes = genes.copy()
+        for _ in range(self.num_difference_vectors):
+            i2, i3 = (np.stack(indices) for indices in zip(*[functions.difference_indices(self.pop_size, self.rngs[run]) for run in runs]))
+            trial_genes += self.mutation_factor * (np.take_along_axis(genes, i2[:, :, None], axis=1) - np.take_along_axis(genes, i3[:, :, None], axis=1))
+        trial_genes = np.clip(trial_genes, np.array(self.objective_function.get_xmin()), np.array(self.objective_function.get_xmax()))
+
+        mask = np.stack([functions.crossover_mask(self.pop_size, self.objective_function.get_nvar(), self.crossover_rate, binary,
+                                                  rng=self.rngs[run]) for run in runs])
+        offspring_genes = np.where(mask, trial_genes, genes)
+
+        return (offspring_genes, *self.evaluate(runs, offspring_genes))
+
+    def parent_vs_child_selection(self, runs, offspring_population):
+        genes, objective_values, constraint_values = offspring_population
+        child_fitness, child_constraint_violation = self.score(objective_values, constraint_values)
+        if self.constraint_handling.lexicographic:
+            mask = functions.lexicographic_less_equal(self.fitness[runs], self.comparison_violation(runs, self.constraint_violation[runs]),
+                                                      child_fitness, self.comparison_violation(runs, child_constraint_violation))
+        else:
+            mask = self.fitness[runs] <= child_fitness
+        self.set_runs(runs, np.where(mask[:, :, None], self.genes[runs], genes),
+                      np.where(mask, self.objective_values[runs], objective_values),
+                      np.where(mask[:, :, None], self.constraint_values[runs], constraint_values))
+
+    def stochastic_ranking(self, runs, binary=False, Pf=0.45):
+        if self.penalty:
+            raise ValueError("Cannot perform Stochastic Ranking if penalty is included in fitness")
+
+        genes, objective_values, constraint_values = self.binomial_crossover(runs, binary)
+        fitness, constraint_violation = self.score(objective_values, constraint_values)
+        all_fitness = np.concatenate((self.fitness[runs], fitness), axis=1)
+        all_constraint_violation = np.concatenate((self.constraint_violation[runs], constraint_violation), axis=1)
+
+        survivors = functions.stochastic_ranking_indices_batch(all_fitness, all_constraint_violation, Pf,
+                                                               [self.rngs[run] for run in runs])[:, :self.pop_size]
+
+        self.set_runs(runs, np.take_along_axis(np.concatenate((self.genes[runs], genes), axis=1), survivors[:, :, None], axis=1),
+                      np.take_along_axis(np.concatenate((self.objective_values[runs], objective_values), axis=1), survivors, axis=1),
+                      np.take_along_axis(np.concatenate((self.constraint_values[runs], constraint_values), axis=1), survivors[:, :, None], axis=1))
+
+    def pass_next_generation(self, runs):
+        """
+        Records the statistics of every given run and updates the generation count shared by all runs
+        """
+        best = self.best_indices(runs)
+        best_fitness = self.objective_values[runs, best]
+        weighted_penalty, unweighted_penalty, num_violations = self.objective_function.penalty_from_constraints(self.constraint_values[runs, best])
+        best_fitness_with_penalty = self.fitness[runs, best] # read before rescoring with the next schedule
+        fitness = self.fitness[runs]
+        feasible_fraction = np.mean(self.num_violations[runs] == 0, axis=1)
+        diversity = functions.genotypic_diversity(self.genes[runs], self.objective_function.get_xmin(), self.objective_function.get_xmax())
+
+        self.generation_t += 1
+        self.update_dynamic_factors()
+        self.rescore(runs)
+
+        mean_fitness, std_fitness, worst_fitness = np.mean(fitness, axis=1), np.std(fitness, axis=1), np.max(fitness, axis=1)
+        for i, run in enumerate(runs):
+            self.generation_statistics[run].record(
+                self.generation_t,
+                best_fitness=best_fitness[i],
+                best_fitness_with_penalty=best_fitness_with_penalty[i],
+                weighted_penalty=weighted_penalty[i],
+                unweighted_penalty=unweighted_penalty[i],
+                num_violations=num_violations[i],
+                mean_fitness=mean_fitness[i],
+                std_fitness=std_fitness[i],
+                worst_fitness=worst_fitness[i],
+                feasible_fraction=feasible_fraction[i],
+                diversity=diversity[i]
+            )
+
+    def check_stopping_criteria(self, run):
+        """
+        Returns the reason for the given run to stop after its last recorded generation, or None to continue
+        """
+        run_statistics = self.generation_statistics[run]
+        return self.run_stopping_criteria[run].check(run_statistics.last("best_fitness"), run_statistics.last("num_violations"),
+                                                     self.evaluation_counts[run], run_statistics.last("diversity"))
+
+    def get_population_statistics(self, run=None):
+        """
+        Returns the list of GenerationStatistics of all the runs, or those of one run
+        """
+        return self.generation_statistics if run is None else self.generation_statistics[run]
+
+    def step(self, algorithm_selection):
+        """
+        Runs a single generation of GA, DE or DE+SR (see Population.step) in every active run
+        """
+        runs = np.flatnonzero(self.active)
+        if algorithm_selection == "GA":
+            self.roulette_wheel_selection(runs)
+            self.sbx_and_pbm(runs)
+        elif algorithm_selection == "DE+SR":
+            self.stochastic_ranking(runs, binary=True, Pf=0.35)
+        elif algorithm_selection == "DE":
+            offspring_population = self.binomial_crossover(runs, binary=True)
+            self.parent_vs_child_selection(runs, offspring_population)
+        else:
+            raise ValueError(f"MultiRunPopulation supports the GA, DE and DE+SR selections, not {algorithm_selection}")
+
+        self.pass_next_generation(runs)
+
+    def evolve(self, algorithm_selection, resume=False):
+        """
+        Evolves every run until max_generations or one of its stopping criteria is reached, the reasons are kept in
+        stop_reasons and in the statistics of each run
+
+        Parameters:
+        - resume (bool): continue after load_checkpoint without resetting the stopping criteria and the frozen runs
+        """
+        if not resume:
+            for stopping_criteria in self.run_stopping_criteria:
+                stopping_criteria.start()
+            self.stop_reasons = [None] * self.n_runs
+            self.active[:] = True
+        while self.generation_t < self.max_generations and np.any(self.active):
+            self.step(algorithm_selection)
+            for run in np.flatnonzero(self.active):
+                self.stop_reasons[run] = self.check_stopping_criteria(run)
+                self.active[run] = self.stop_reasons[run] is None
+            if self.checkpoint_interval > 0 and self.generation_t % self.checkpoint_interval == 0:
+                self.save_checkpoint(self.checkpoint_path)
+
+        for run in range(self.n_runs):
+            self.stop_reasons[run] = self.stop_reasons[run] or "max_generations"
+            self.generation_statistics[run].stop_reason = self.stop_reasons[run]
+        self.update_best()
+
+    def save_checkpoint(self, path):
+        """
+        Saves the state needed to resume every run to a compressed .npz file: genes with their raw objective and
+        constraint values, generation counter, frozen runs, and the statistics, stopping state and RNG state of each run.
+        """
+        run_state = {}
+        for run in range(self.n_runs):
+            run_state.update(checkpoint.prefixed(f"statistics_{run}", self.generation_statistics[run].get_state()))
+            run_state.update(checkpoint.prefixed(f"stopping_{run}", self.run_stopping_criteria[run].get_state()))
+            run_state.update(checkpoint.prefixed(f"rng_{run}", checkpoint.rng_state(self.rngs[run])))
+        checkpoint.save_npz(
+            path,
+            genes=self.genes,
+            objective_values=self.objective_values,
+            constraint_values=self.constraint_values,
+            generation_t=np.array(self.generation_t),
+            evaluation_counts=self.evaluation_counts,
+            evaluation_count=np.array(self.objective_function.evaluation_count),
+            active=self.active,
+            stop_reasons=np.array([reason or "" for reason in self.stop_reasons]),
+            **checkpoint.prefixed("constraint_handling", self.constraint_handling.get_state()),
+            **run_state
+        )
+
+    def load_checkpoint(self, path):
+        """
+        Restores a state saved by save_checkpoint into a MultiRunPopulation built with the same problem, config file and
+        number of seeds. Continue with evolve(algorithm_selection, resume=True) to reproduce the uninterrupted runs.
+        """
+        state = checkpoint.load_npz(path)
+        if len(state["genes"]) != self.n_runs:
+            raise ValueError(f"The checkpoint holds {len(state['genes'])} runs, not {self.n_runs}")
+        self.generation_t = int(state["generation_t"])
+        self.update_dynamic_factors()
+        self.constraint_handling.set_state(checkpoint.unprefixed("constraint_handling", state)) # epsilon levels, before rescoring
+        self.evaluator.objective_function.evaluation_count = int(state["evaluation_count"]) # counted by the wrapped problem
+        self.evaluation_counts = state["evaluation_counts"].copy()
+        self.genes = state["genes"].copy()
+        self.objective_values = state["objective_values"].copy()
+        self.constraint_values = state["constraint_values"].copy()
+        self.rescore(np.arange(self.n_runs))
+        self.update_best()
+        self.active = state["active"].copy()
+        self.stop_reasons = [str(reason) or None for reason in state["stop_reasons"]]
+        for run in range(self.n_runs):
+            self.generation_statistics[run].set_state(checkpoint.unprefixed(f"statistics_{run}", state))
+            self.run_stopping_criteria[run].set_state(checkpoint.unprefixed(f"stopping_{run}", state))
+            checkpoint.set_rng_state(self.rngs[run], checkpoint.unprefixed(f"rng_{run}", state))
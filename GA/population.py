@@ -1,4 +1,3 @@
-import random
 import numpy as np
 import pandas as pd
 from utils import *
@@ -7,17 +6,35 @@ from GA import *
 import configparser
 
 
-class Population:
+class Population(RunControl):
     """
     Class representing a population of Chromosomes in a genetic algorithm.
 
     Parameters:
     - n_var (int): number of variables in the problem
+    - penalty (bool): include the penalty in fitness, always False when [ConstraintSettings] compares by feasibility
+    - stopping_criteria (StoppingCriteria): overrides the [StoppingSettings] section of the config file
+    - seed (int or np.random.SeedSequence): seed of the population's own np.random.Generator, every operator draws from
+                                           it so a run only depends on its seed (unseeded if None)
     """
-    def __init__(self, objective_function, penalty = True, n_var=None, t= None, config_file=None, crossover_rate=0.8, mutation_factor=0.6, num_difference_vectors = 1, chromosomes = None):
+    statistics_fields = [
+        ("best_fitness", np.float64), # Does not consider penalty
+        ("best_fitness_with_penalty", np.float64),
+        ("weighted_penalty", np.float64),
+        ("unweighted_penalty", np.float64),
+        ("num_violations", np.int64),
+        ("mean_fitness", np.float64),
+        ("std_fitness", np.float64),
+        ("worst_fitness", np.float64),
+        ("feasible_fraction", np.float64),
+        ("diversity", np.float64),
+        ("restarts", np.int64) # restarts so far, see restart
+    ]
+
+    def __init__(self, objective_function, penalty = True, n_var=None, t= None, config_file=None, crossover_rate=0.8, mutation_factor=0.6, num_difference_vectors = 1, chromosomes = None, stopping_criteria = None, seed = None):
         self.generation_t = t if t is not None else 0
         self.penalty = penalty
-        self.generation_statistics = {}
+        self.rng = np.random.default_rng(seed)
         
         if isinstance(objective_function, str):
             self.objective_function = problems.FunctionFactory.select_function(objective_function, n_var)
@@ -25,12 +42,33 @@ class Population:
             raise ValueError("objective_function should be a string whose name is defined in Problems/problems.py")
         
         self.load_config(config_file)
+        self.penalty = penalty and not self.constraint_handling.lexicographic
+        if stopping_criteria is not None:
+            self.stopping_criteria = stopping_criteria
+        self.stop_reason = None
+        self.initial_pop_size = self.pop_size
+        self.jde_parameters, self.success_history, self.archive = None, None, None # self-adaptive DE state, created on first use
+        self.generation_statistics = statistics.GenerationStatistics(self.statistics_fields, self.max_generations, self.statistics_ring_size)
+        self.evaluator = evaluators.create_evaluator(self.objective_function, self.evaluator_backend, self.evaluator_workers,
+                                                     self.evaluator_chunk_size)
+        self.objective_function = self.evaluator
+        if self.evaluation_cache_size > 0:
+            self.objective_function = evaluation_cache.CachedObjectiveFunction(self.objective_function, self.evaluation_cache_size)
         self.update_dynamic_factors()
     
-        self.chromosomes = chromosomes if chromosomes is not None else np.array([Chromosome(self.objective_function, penalty = self.penalty) for _ in range(self.pop_size)])
+        self.initialize_population(chromosomes)
+        self.constraint_handling.start(self.get_constraint_violation())
         
         self.update_best()
 
+    def initialize_population(self, chromosomes=None):
+        if chromosomes is None: # genes of the whole population are drawn in one block
+            genes = self.rng.uniform(self.objective_function.get_xmin(), self.objective_function.get_xmax(),
+                                     size=(self.pop_size, self.objective_function.get_nvar()))
+            chromosomes = np.array([Chromosome(self.objective_function, penalty=self.penalty, genes=genes[i], rng=self.rng) for i in range(self.pop_size)])
+        self.chromosomes = chromosomes
+        self.evaluate_pending()
+
     def load_config(self, config_file):
         config = configparser.ConfigParser()
         config.read(config_file)
@@ -40,6 +78,25 @@ class Population:
         self.crossover_rate = float(config['PopulationSettings']['crossover_rate']) 
         self.mutation_factor = float(config['PopulationSettings']['mutation_factor']) 
         self.num_difference_vectors = int(config['PopulationSettings']['num_difference_vectors'])
+        self.evaluation_cache_size = config.getint('PopulationSettings', 'evaluation_cache_size', fallback=0) # 0 disables the cache
+        self.statistics_ring_size = config.getint('PopulationSettings', 'statistics_ring_size', fallback=0) # 0 keeps every generation
+        self.per_gene_spread = config.getboolean('PopulationSettings', 'per_gene_spread', fallback=False) # SBX spread factor per gene instead of per pair
+        # Fitness evaluation back end (optional): serial, thread or process
+        self.evaluator_backend = config.get('EvaluatorSettings', 'backend', fallback='serial')
+        self.evaluator_workers = config.getint('EvaluatorSettings', 'n_workers', fallback=0) or None # 0 uses every CPU
+        self.evaluator_chunk_size = config.getint('EvaluatorSettings', 'chunk_size', fallback=0) # 0 splits batches evenly across workers
+        # Self-adaptive DE (optional): jDE, SHADE and L-SHADE selections of evolve
+        self.memory_size = config.getint('AdaptiveDESettings', 'memory_size', fallback=6) # H, slots of the success-history memory
+        self.p_best = config.getfloat('AdaptiveDESettings', 'p_best', fallback=0.11) # fraction of the population pbest is drawn from
+        self.archive_rate = config.getfloat('AdaptiveDESettings', 'archive_rate', fallback=2.6) # archive size relative to pop_size
+        self.min_pop_size = config.getint('AdaptiveDESettings', 'min_pop_size', fallback=4) # final size of L-SHADE's linear reduction
+        if self.pop_size < 4 or self.min_pop_size < 4:
+            raise ValueError("pop_size and min_pop_size should be at least 4, DE draws 3 distinct individuals besides the target")
+        # Periodic checkpoints (optional), see save_checkpoint
+        self.checkpoint_interval = config.getint('CheckpointSettings', 'checkpoint_interval', fallback=0) # 0 disables them
+        self.checkpoint_path = config.get('CheckpointSettings', 'checkpoint_path', fallback='checkpoint.npz')
+        # Constraint handling (optional): penalty, feasibility rules or epsilon-constrained
+        self.constraint_handling = constraint_handling.ConstraintHandling.from_config(config)
         # Dynamic Penalty
         self.max_penalty_exp = float(config['PenaltySettings']['max_penalty_exp'])
         self.min_penalty_exp = float(config['PenaltySettings']['min_penalty_exp'])
@@ -47,6 +104,10 @@ class Population:
         self.min_penalty_factor = float(config['PenaltySettings']['min_penalty_factor'])
         self.max_tolerance_factor = float(config['PenaltySettings']['max_tolerance_factor'])
         self.min_tolerance_factor = float(config['PenaltySettings']['min_tolerance_factor'])
+        # Stopping criteria (optional)
+        self.stopping_criteria = stopping.StoppingCriteria.from_config(config)
+        # Restarts on diversity collapse (optional)
+        self.restart_strategy = restart.RestartStrategy.from_config(config)
 
     def update_dynamic_factors(self):
         progress = self.generation_t / self.max_generations
@@ -55,34 +116,229 @@ class Population:
         penalty_exp = self.min_penalty_exp + progress * (self.max_penalty_exp - self.min_penalty_exp)
         
         self.objective_function.set_penalty_factors(penalty_factor, tolerance_factor, penalty_exp)
+        self.constraint_handling.update(progress)
+
+    def evaluate_pending(self, chromosomes=None):
+        """
+        Evaluates, in a single batched call, every chromosome whose genes changed since its last evaluation
+        """
+        chromosomes = self.chromosomes if chromosomes is None else chromosomes
+        pending = [chromo for chromo in chromosomes if chromo.dirty]
+        if pending:
+            objective_values, constraint_values = self.objective_function.evaluate_raw_batch(np.array([chromo.genes for chromo in pending]))
+            for chromo, objective_value, constraint_value in zip(pending, objective_values, constraint_values):
+                chromo.set_raw_values(objective_value, constraint_value)
+                chromo.n_evaluations += 1
+            if self.constraint_handling.lexicographic: # chromosomes score themselves with the weighted penalty
+                _, constraint_violation = self.score(objective_values, constraint_values)
+                for chromo, value in zip(pending, constraint_violation):
+                    chromo.set_constraint_violation(value)
+
+    def set_population(self, genes, objective_values, constraint_values):
+        """
+        Replaces the population by already evaluated individuals and scores them with the current penalty schedule
+        """
+        self.chromosomes = np.array([Chromosome(self.objective_function, penalty=self.penalty, genes=genes[i].copy(), rng=self.rng,
+                                                objective_value=objective_values[i], constraint_values=constraint_values[i])
+                                     for i in range(len(genes))])
+        self.rescore()
+
+    def score(self, objective_values, constraint_values):
+        """
+        Returns (fitness, constraint_violation) vectors under the current penalty schedule. constraint_violation is the
+        weighted penalty with the penalty method and the sum of violations with the feasibility and epsilon methods.
+        """
+        weighted_penalty, unweighted_penalty, _ = self.objective_function.penalty_from_constraints(constraint_values)
+        constraint_violation = unweighted_penalty if self.constraint_handling.lexicographic else weighted_penalty
+        if self.penalty: # penalty is included in fitness
+            return objective_values + weighted_penalty, constraint_violation
+        return objective_values, constraint_violation # fitness does not include penalty (stochastic ranking, feasibility rules)
+
+    def get_raw_values(self):
+        """
+        Returns the (objective_values, constraint_values) arrays of the population, as evaluated
+        """
+        objective_values = np.array([chromo.objective_value for chromo in self.chromosomes], dtype=float)
+        constraint_values = np.array([chromo.constraint_values for chromo in self.chromosomes], dtype=float).reshape(len(objective_values), -1)
+        return objective_values, constraint_values
+
+    def rescore(self):
+        """
+        Re-applies the current penalty schedule to the stored raw objective and constraint values of the whole population,
+        so fitness matches the current generation without calling evaluate again
+        """
+        self.evaluate_pending()
+        _, constraint_violation = self.score(*self.get_raw_values())
+        for chromo, value in zip(self.chromosomes, constraint_violation):
+            chromo.set_constraint_violation(value)
 
     def update_best(self):
-        self.best_chromosome = min(self.chromosomes, key=lambda chromo: chromo.fitness)
+        self.best_chromosome = self.chromosomes[self.constraint_handling.best(self.get_fitness(), self.get_constraint_violation())]
 
     def pass_next_generation(self):
         """
-        Calculates fitness, penalties and number of violations from best_chromosome, saves it into a dictionary and updates
-        generation count that is used for eta_m in pbm and as a stop criteria for evolve method
+        Records statistics of the best chromosome and of the whole population and updates generation count that is used
+        for eta_m in pbm and as a stop criteria for evolve method
         """
         self.update_best()
-        best_fitness, weighted_penalty, unweighted_penalty, num_violations =  self.best_chromosome.return_fitness()
-        
+        best_chromosome = self.best_chromosome
+        best_fitness, weighted_penalty, unweighted_penalty, num_violations =  best_chromosome.return_fitness()
+        best_fitness_with_penalty = best_chromosome.fitness # read before rescoring with the next schedule
+        fitness = self.get_fitness()
+        feasible_fraction = np.mean(self.get_num_violations() == 0)
+        diversity = functions.genotypic_diversity(self.get_genes(), self.objective_function.get_xmin(), self.objective_function.get_xmax())
+
         self.generation_t += 1
         self.update_dynamic_factors()
+        self.rescore()
+
+        self.generation_statistics.record(
+            self.generation_t,
+            best_fitness=best_fitness,
+            best_fitness_with_penalty=best_fitness_with_penalty,
+            weighted_penalty=weighted_penalty,
+            unweighted_penalty=unweighted_penalty,
+            num_violations=num_violations,
+            mean_fitness=np.mean(fitness),
+            std_fitness=np.std(fitness),
+            worst_fitness=np.max(fitness),
+            feasible_fraction=feasible_fraction,
+            diversity=diversity,
+            restarts=self.restart_strategy.restarts
+        )
+
+    def get_genes(self):
+        """
+        Returns the (pop_size, nvar) array of genes of the population
+        """
+        return np.array([chromo.genes for chromo in self.chromosomes])
+
+    def get_fitness(self):
+        return np.array([chromo.fitness for chromo in self.chromosomes])
 
-        self.generation_statistics[self.generation_t] = {
-            "best_fitness": best_fitness, # Does not consider penalty
-            "best_fitness_with_penalty": self.best_chromosome.fitness,
-            "weighted_penalty": weighted_penalty,
-            "unweighted_penalty": unweighted_penalty,
-            "num_violations": num_violations
+    def get_num_violations(self):
+        constraint_values = np.array([chromo.constraint_values for chromo in self.chromosomes])
+        return self.objective_function.penalty_from_constraints(constraint_values)[2]
+
+    def get_constraint_violation(self):
+        return np.array([chromo.constraint_violation for chromo in self.chromosomes])
+
+    def migration_order(self):
+        """
+        Returns the indices of the population from best to worst, by fitness or, when the penalty is not included in
+        fitness, by constraint violation first and fitness second (see ConstraintHandling.order)
+        """
+        if self.constraint_handling.lexicographic:
+            return self.constraint_handling.order(self.get_fitness(), self.get_constraint_violation())
+        if self.penalty:
+            return np.argsort(self.get_fitness(), kind='stable')
+        return np.lexsort((self.get_fitness(), self.get_constraint_violation()))
+
+    def get_migrants(self, k):
+        """
+        Returns the best k individuals as compact arrays (genes, objective_values, constraint_values, fitness, constraint_violation)
+        """
+        best = self.migration_order()[:k]
+        chromosomes = self.chromosomes[best]
+        return {
+            "genes": np.array([chromo.genes for chromo in chromosomes]),
+            "objective_values": np.array([chromo.objective_value for chromo in chromosomes]),
+            "constraint_values": np.array([chromo.constraint_values for chromo in chromosomes]),
+            "fitness": self.get_fitness()[best],
+            "constraint_violation": self.get_constraint_violation()[best]
         }
 
-    def get_population_statistics(self):
+    def accept_migrants(self, migrants):
+        """
+        Replaces the worst individuals of the population by the migrants (as returned by get_migrants), without evaluating them again
+        """
+        worst = self.migration_order()[::-1][:len(migrants["genes"])]
+        for i, index in enumerate(worst):
+            self.chromosomes[index] = Chromosome(self.objective_function, penalty=self.penalty, genes=migrants["genes"][i].copy(), rng=self.rng,
+                                                 objective_value=migrants["objective_values"][i], constraint_values=migrants["constraint_values"][i])
+        self.rescore()
+        self.update_best()
+
+    def restart(self):
+        """
+        Replaces the population by new random individuals, enlarged by pop_size_factor, keeping the best individual so
+        far in the first row. The self-adaptive DE state starts over and L-SHADE reduces from the new size.
+        """
+        best = self.best_chromosome
+        self.pop_size = self.restart_strategy.next_pop_size(self.pop_size)
+        self.initial_pop_size = self.pop_size
+        genes = self.rng.uniform(self.objective_function.get_xmin(), self.objective_function.get_xmax(),
+                                 size=(self.pop_size - 1, self.objective_function.get_nvar()))
+        objective_values, constraint_values = self.objective_function.evaluate_raw_batch(genes)
+        self.set_population(np.concatenate((best.genes[None, :], genes)),
+                            np.concatenate(([best.objective_value], objective_values)),
+                            np.concatenate((np.reshape(best.constraint_values, (1, -1)), np.reshape(constraint_values, (len(genes), -1)))))
+        self.jde_parameters, self.success_history, self.archive = None, None, None
+        self.update_best()
+
+    def save_checkpoint(self, path):
         """
-        Returns dictionary with information about best individual across generations
+        Saves the state needed to resume the run to a compressed .npz file: genes with their raw objective and constraint
+        values, generation counter and penalty schedule, statistics so far, stopping state and RNG state.
         """
-        return self.generation_statistics
+        objective_values, constraint_values = self.get_raw_values()
+        adaptive_state = {}
+        for name in ("jde_parameters", "success_history", "archive"):
+            if getattr(self, name) is not None:
+                adaptive_state.update(checkpoint.prefixed(name, getattr(self, name).get_state()))
+        checkpoint.save_npz(
+            path,
+            genes=self.get_genes(),
+            objective_values=objective_values,
+            constraint_values=constraint_values,
+            generation_t=np.array(self.generation_t),
+            initial_pop_size=np.array(self.initial_pop_size),
+            penalty_schedule=np.array([self.objective_function.penalty_factor, self.objective_function.tolerance_factor,
+                                       self.objective_function.penalty_exp]),
+            evaluation_count=np.array(self.objective_function.evaluation_count),
+            **checkpoint.prefixed("statistics", self.generation_statistics.get_state()),
+            **checkpoint.prefixed("stopping", self.stopping_criteria.get_state()),
+            **checkpoint.prefixed("constraint_handling", self.constraint_handling.get_state()),
+            **checkpoint.prefixed("restart", self.restart_strategy.get_state()),
+            **adaptive_state,
+            **checkpoint.rng_state(self.rng)
+        )
+
+    def load_checkpoint(self, path):
+        """
+        Restores a state saved by save_checkpoint into a population built with the same problem and config file. Continue
+        with evolve(algorithm_selection, resume=True) to reproduce the uninterrupted run.
+        """
+        state = checkpoint.load_npz(path)
+        self.generation_t = int(state["generation_t"])
+        self.update_dynamic_factors()
+        self.constraint_handling.set_state(checkpoint.unprefixed("constraint_handling", state)) # epsilon level, before update_best
+        self.evaluator.objective_function.evaluation_count = int(state["evaluation_count"]) # counted by the wrapped problem
+        self.set_population(state["genes"], state["objective_values"], state["constraint_values"])
+        self.pop_size = len(state["genes"]) # L-SHADE shrinks the population, restarts enlarge it
+        if "initial_pop_size" in state:
+            self.initial_pop_size = int(state["initial_pop_size"])
+        if "restart_restarts" in state:
+            self.restart_strategy.set_state(checkpoint.unprefixed("restart", state))
+        self.update_best()
+        if "jde_parameters_F" in state:
+            self.jde_parameters = adaptive_de.JDEParameters(self.pop_size)
+            self.jde_parameters.set_state(checkpoint.unprefixed("jde_parameters", state))
+        if "success_history_k" in state:
+            self.success_history = adaptive_de.SuccessHistory(self.memory_size)
+            self.success_history.set_state(checkpoint.unprefixed("success_history", state))
+            self.archive = adaptive_de.Archive(state["genes"].shape[1], 0)
+            self.archive.set_state(checkpoint.unprefixed("archive", state))
+        self.generation_statistics.set_state(checkpoint.unprefixed("statistics", state))
+        self.stopping_criteria.set_state(checkpoint.unprefixed("stopping", state))
+        self.stop_reason = self.generation_statistics.stop_reason
+        checkpoint.set_rng_state(self.rng, state)
+
+    def close(self):
+        """
+        Shuts down the worker pool of the evaluator, if any. Workers are otherwise reused across generations and runs
+        """
+        self.evaluator.close()
 
     def random_selection(self, with_replacement=False):
         """
@@ -90,7 +346,7 @@ class Population:
         """
         selection_size = self.pop_size
 
-        selected_indices = np.random.choice(
+        selected_indices = self.rng.choice(
             self.pop_size,
             size=self.pop_size,
             replace=with_replacement
@@ -106,16 +362,16 @@ class Population:
         - p (float): probability of flipping the decision (for probabilistic approach 0.5 < p <= 1, for deterministic p = 0)
         """
         winners = []
+        selection_values = self.constraint_handling.selection_values(self.get_fitness(), self.get_constraint_violation())
 
         while len(winners) < self.pop_size:
-            shuffled_indices = np.random.permutation(self.pop_size)
+            shuffled_indices = self.rng.permutation(self.pop_size)
             reshaped_indices = shuffled_indices[:len(shuffled_indices) - len(shuffled_indices) % q].reshape(-1, q)
 
-            group_fitness = np.array([[self.chromosomes[idx].fitness for idx in group] for group in reshaped_indices])
-            best_in_group = np.argmin(group_fitness, axis=1)
+            best_in_group = np.argmin(selection_values[reshaped_indices], axis=1)
 
-            alternative_indices = np.random.randint(0, q, size=best_in_group.shape)
-            flip_decision = np.random.rand(best_in_group.size) < p
+            alternative_indices = self.rng.integers(0, q, size=best_in_group.shape)
+            flip_decision = self.rng.random(best_in_group.size) < p
             selected_indices = np.where(flip_decision, alternative_indices, best_in_group)
 
             selected_chromosomes = [self.chromosomes[reshaped_indices[i, selected_indices[i]]] for i in range(len(selected_indices))]
@@ -127,7 +383,9 @@ class Population:
     def parent_vs_child_selection(self, offspring_population):
         parent_fitness = np.array([parent.fitness for parent in self.chromosomes])
         child_fitness = np.array([child.fitness for child in offspring_population])
-        mask = parent_fitness <= child_fitness
+        parent_violation = np.array([parent.constraint_violation for parent in self.chromosomes])
+        child_violation = np.array([child.constraint_violation for child in offspring_population])
+        mask = self.constraint_handling.less_equal(parent_fitness, parent_violation, child_fitness, child_violation)
         best_population = np.where(mask, self.chromosomes, offspring_population)
         self.chromosomes = np.array(best_population)
 
@@ -136,18 +394,20 @@ class Population:
         Applies differential evolution to the population which generates a trial population
         """
         all_genes = np.array([chromo.genes for chromo in self.chromosomes])
+        trial_genes = self.difference_vectors(all_genes, num_difference_vectors)
+
+        trial_chromosomes = [Chromosome(self.objective_function, penalty=self.penalty, genes=trial_genes[i], rng=self.rng) for i in range(self.pop_size)]
+
+        return np.array(trial_chromosomes)
+
+    def difference_vectors(self, all_genes, num_difference_vectors):
+        """
+        Returns the (pop_size, nvar) trial genes x_i + F * sum(x_r2 - x_r3), clipped to the problem bounds
+        """
         trial_genes = all_genes.copy() 
 
         for _ in range(num_difference_vectors):
-            idxs = np.arange(self.pop_size)
-            i2 = np.random.choice(idxs, self.pop_size, replace=True)
-            i3 = np.random.choice(idxs, self.pop_size, replace=True)
-
-            valid = (i2 != idxs) & (i3 != idxs) & (i2 != i3)
-            while not np.all(valid):
-                i2 = np.where(valid, i2, np.random.choice(idxs, self.pop_size, replace=True))
-                i3 = np.where(valid, i3, np.random.choice(idxs, self.pop_size, replace=True))
-                valid = (i2 != idxs) & (i3 != idxs) & (i2 != i3)
+            i2, i3 = functions.difference_indices(self.pop_size, self.rng)
 
             x2_genes = all_genes[i2]
             x3_genes = all_genes[i3]
@@ -158,21 +418,20 @@ class Population:
         X_upper = np.array(self.objective_function.get_xmax())
         trial_genes = np.clip(trial_genes, X_lower, X_upper)
 
-        trial_chromosomes = [Chromosome(self.objective_function, genes=trial_genes[i]) for i in range(self.pop_size)]
-
-        return np.array(trial_chromosomes)
+        return trial_genes
 
     def binomial_crossover(self, binary=False):
         """
         Apply binomial or binary crossover to the population with the trial population and selects the best for each pair.
         """
-        trial_population = self.differential_evolution(self.num_difference_vectors)
-        offspring_population = []
+        all_genes = np.array([chromo.genes for chromo in self.chromosomes])
+        trial_genes = self.difference_vectors(all_genes, self.num_difference_vectors)
+        mask = functions.crossover_mask(self.pop_size, self.objective_function.get_nvar(), self.crossover_rate, binary, rng=self.rng)
+        offspring_genes = np.where(mask, trial_genes, all_genes)
+
+        offspring_population = [Chromosome(self.objective_function, penalty=self.penalty, genes=offspring_genes[i], rng=self.rng) for i in range(self.pop_size)]
+        self.evaluate_pending(offspring_population)
 
-        for chromosome, trial in zip(self.chromosomes, trial_population):
-            offspring = chromosome.binomial_crossover(trial, binary, self.crossover_rate)
-            offspring_population.append(offspring)
-    
         return np.array(offspring_population)
 
     def stochastic_ranking(self, binary=False, Pf=0.45):
@@ -183,7 +442,7 @@ class Population:
 
         combined_population = np.concatenate((self.chromosomes, offspring_population))
 
-        ranked_population = functions.stochastic_ranking(combined_population, Pf)
+        ranked_population = functions.stochastic_ranking(combined_population, Pf, rng=self.rng)
 
         self.chromosomes = np.array(ranked_population[:self.pop_size])
 
@@ -191,31 +450,20 @@ class Population:
         """
         Apply SBX (Simulated Binary Crossover) and PBM (Parameter-Based Mutation) across the population.
         """
-        offspring_population = []
-        np.random.shuffle(self.chromosomes)
-        for i in range(0, self.pop_size, 2):
-            parent1 = self.chromosomes[i]
-            parent2 = self.chromosomes[(i + 1) % self.pop_size]
-
-            if np.random.rand() < self.crossover_rate:
-                child1, child2 = parent1.sbx(parent2)
-            else:
-                child1, child2 = Chromosome(self.objective_function, genes=parent1.genes.copy()), Chromosome(self.objective_function, genes=parent2.genes.copy())
-
-            child1.parameter_based_mutation(self.generation_t)
-            child2.parameter_based_mutation(self.generation_t)
+        self.chromosomes = self.chromosomes[self.rng.permutation(self.pop_size)]
+        genes = np.array([chromo.genes for chromo in self.chromosomes])
+        offspring_genes = functions.sbx_and_pbm(genes, self.objective_function.get_xmin(), self.objective_function.get_xmax(),
+                                                self.generation_t, self.crossover_rate, per_gene_spread=self.per_gene_spread, rng=self.rng)
 
-            child1.apply_bounds()
-            child2.apply_bounds()
-            offspring_population.extend([child1, child2])
-
-        self.chromosomes = np.array(offspring_population[:self.pop_size])
+        self.chromosomes = np.array([Chromosome(self.objective_function, penalty=self.penalty, genes=offspring_genes[i], rng=self.rng) for i in range(self.pop_size)])
+        self.evaluate_pending()
 
     def roulette_wheel_selection(self, replace=True):
         """
-        Selects individuals from the population using roulette wheel selection.
+        Selects individuals from the population using roulette wheel selection. With feasibility rules the wheel is built
+        on the lexicographic ranks instead of the fitness values.
         """
-        fitness_values = np.array([chromo.fitness for chromo in self.chromosomes])
+        fitness_values = self.constraint_handling.selection_values(self.get_fitness(), self.get_constraint_violation())
         
         if np.min(fitness_values) < 0:
             fitness_values = fitness_values + np.abs(np.min(fitness_values))
@@ -228,25 +476,152 @@ class Population:
         else:
             probabilities = inverted_fitness_values / total_fitness
 
-        selected_indices = np.random.choice(
+        selected_indices = self.rng.choice(
             self.pop_size, size=self.pop_size, replace=replace, p=probabilities
         )
         selected_chromosomes = [self.chromosomes[idx] for idx in selected_indices]
         self.chromosomes = np.array(selected_chromosomes)
 
-    def evolve(self, algorithm_selection):
+    def adaptive_differential_evolution(self, variant, stochastic_ranking=False, Pf=0.45):
         """
-        Evolve the population with either GA (random selection, sbx_and_pbm) or DE (dif. evolution, binomial crossover and selection)
+        One generation of self-adaptive DE:
+        - "jDE": DE/rand/1/bin with per-individual F and CR that are redrawn with a small probability and kept when the
+                 trial vector survives
+        - "SHADE": current-to-pbest/1/bin with an external archive, F and CR drawn around a success-history memory
+        - "L-SHADE": SHADE with linear population size reduction from pop_size to min_pop_size
+
+        Survivors are chosen one-to-one between parent and trial vector by fitness (penalty path) or by the feasibility
+        rules of [ConstraintSettings], or by stochastic ranking of parents and trial vectors together when stochastic_ranking is True (penalty not included in fitness).
         """
+        if stochastic_ranking and self.penalty:
+            raise ValueError("Cannot perform Stochastic Ranking if penalty is included in fitness")
+
+        genes = self.get_genes()
+        objective_values, constraint_values = self.get_raw_values()
+        fitness, constraint_violation = self.get_fitness(), self.get_constraint_violation()
+        xmin, xmax = np.array(self.objective_function.get_xmin()), np.array(self.objective_function.get_xmax())
+        n = len(genes)
+
+        if variant == "jDE":
+            if self.jde_parameters is None:
+                self.jde_parameters = adaptive_de.JDEParameters(n, CR_init=self.crossover_rate, F_init=self.mutation_factor)
+            F, CR = self.jde_parameters.sample(self.rng)
+            r1, r2, r3 = adaptive_de.distinct_indices(n, (n, n, n), self.rng)
+            donor_genes = genes[r1] + F[:, None] * (genes[r2] - genes[r3])
+        else:
+            if self.success_history is None:
+                self.success_history = adaptive_de.SuccessHistory(self.memory_size)
+                self.archive = adaptive_de.Archive(genes.shape[1], round(self.archive_rate * n))
+            F, CR = self.success_history.sample(n, self.rng)
+            if stochastic_ranking:
+                ranking = functions.stochastic_ranking_indices(fitness, constraint_violation, Pf, rng=self.rng)
+            else:
+                ranking = self.constraint_handling.order(fitness, constraint_violation)
+            pbest = ranking[self.rng.integers(0, max(2, round(self.p_best * n)), size=n)]
+            r1, r2 = adaptive_de.distinct_indices(n, (n, n + len(self.archive)), self.rng)
+            population_and_archive = np.concatenate((genes, self.archive.genes))
+            donor_genes = genes + F[:, None] * (genes[pbest] - genes) + F[:, None] * (genes[r1] - population_and_archive[r2])
+
+        donor_genes = adaptive_de.midpoint_bounds(donor_genes, genes, xmin, xmax)
+        mask = functions.crossover_mask(n, genes.shape[1], CR[:, None], rng=self.rng)
+        trial_genes = np.where(mask, donor_genes, genes)
+        trial_objective_values, trial_constraint_values = self.objective_function.evaluate_raw_batch(trial_genes)
+        trial_fitness, trial_constraint_violation = self.score(trial_objective_values, trial_constraint_values)
+
+        if stochastic_ranking:
+            ranked = functions.stochastic_ranking_indices(np.concatenate((fitness, trial_fitness)),
+                                                          np.concatenate((constraint_violation, trial_constraint_violation)), Pf, rng=self.rng)
+            survivors = ranked[:n]
+            succeeded = np.zeros(2 * n, dtype=bool)
+            succeeded[survivors] = True
+            replaced = ~succeeded[:n] # parents that did not survive
+            succeeded = succeeded[n:] # trial vectors that survived
+            improvement = np.abs(fitness - trial_fitness) + np.abs(constraint_violation - trial_constraint_violation)
+        else:
+            survivors = np.where(self.constraint_handling.less_equal(trial_fitness, trial_constraint_violation, fitness, constraint_violation),
+                                 np.arange(n, 2 * n), np.arange(n))
+            succeeded = self.constraint_handling.less(trial_fitness, trial_constraint_violation, fitness, constraint_violation)
+            replaced = succeeded
+            if self.constraint_handling.lexicographic:
+                improvement = np.abs(fitness - trial_fitness) + np.abs(constraint_violation - trial_constraint_violation)
+            else:
+                improvement = fitness - trial_fitness
+
+        if variant == "jDE":
+            self.jde_parameters.F = np.concatenate((self.jde_parameters.F, F))[survivors]
+            self.jde_parameters.CR = np.concatenate((self.jde_parameters.CR, CR))[survivors]
+        else:
+            self.archive.add(genes[replaced], self.rng)
+            self.success_history.update(F[succeeded], CR[succeeded], improvement[succeeded])
+
+        self.set_population(np.concatenate((genes, trial_genes))[survivors],
+                            np.concatenate((objective_values, trial_objective_values))[survivors],
+                            np.concatenate((constraint_values, trial_constraint_values))[survivors])
+
+        if variant == "L-SHADE":
+            self.linear_population_size_reduction()
+
+    def linear_population_size_reduction(self):
+        """
+        Shrinks the population linearly from its initial size to min_pop_size over the run (over max_evaluations if that
+        stopping rule is set, over max_generations otherwise) by removing the worst individuals
+        """
+        if self.stopping_criteria.max_evaluations is not None:
+            progress = self.objective_function.evaluation_count / self.stopping_criteria.max_evaluations
+        else:
+            progress = (self.generation_t + 1) / self.max_generations
+        new_size = max(self.min_pop_size, round(self.initial_pop_size + (self.min_pop_size - self.initial_pop_size) * min(progress, 1)))
+        if new_size < self.pop_size:
+            best = self.migration_order()[:new_size]
+            objective_values, constraint_values = self.get_raw_values()
+            self.set_population(self.get_genes()[best], objective_values[best], constraint_values[best])
+            self.pop_size = new_size
+            self.archive.resize(round(self.archive_rate * new_size), self.rng)
+
+    def step(self, algorithm_selection):
+        """
+        Runs a single generation of GA (roulette selection, sbx_and_pbm), DE (dif. evolution, binomial crossover and
+        selection), DE+SR (dif. evolution, binomial crossover and stochastic ranking) or of the self-adaptive jDE, SHADE
+        and L-SHADE, with one-to-one selection or, with the +SR suffix, stochastic ranking (see adaptive_differential_evolution)
+        """
+        if algorithm_selection == "GA":
+            self.roulette_wheel_selection()
+            self.sbx_and_pbm()
+        elif algorithm_selection == "DE+SR":
+            self.stochastic_ranking(binary=True, Pf=0.35)
+        elif algorithm_selection == "DE":
+            offspring_population = self.binomial_crossover(binary=True)
+            self.parent_vs_child_selection(offspring_population)
+        elif algorithm_selection in ("jDE", "SHADE", "L-SHADE", "jDE+SR", "SHADE+SR", "L-SHADE+SR"):
+            variant, _, ranking = algorithm_selection.partition("+")
+            self.adaptive_differential_evolution(variant, stochastic_ranking=ranking == "SR")
+        else:
+            raise ValueError(f"Unknown algorithm selection {algorithm_selection}")
+
+        self.pass_next_generation()
+
+    def evolve(self, algorithm_selection, resume=False):
+        """
+        Evolve the population with either GA (random selection, sbx_and_pbm), DE (dif. evolution, binomial crossover and selection)
+        or any other selection of step (DE+SR, jDE, SHADE, L-SHADE and their +SR variants) until max_generations or one of the stopping criteria is reached. The reason is kept in stop_reason and in the
+        generation statistics. With [RestartSettings] the population restarts whenever its diversity collapses (see restart).
+
+        Parameters:
+        - resume (bool): continue after load_checkpoint without resetting the stopping criteria (wall clock, stagnation)
+        """
+        if not resume:
+            self.stopping_criteria.start()
+        self.stop_reason = None
         while self.generation_t < self.max_generations:
-            if algorithm_selection == "GA":
-                self.roulette_wheel_selection()
-                self.sbx_and_pbm()
-            elif algorithm_selection == "DE+SR":
-                self.stochastic_ranking(binary=True, Pf=0.35)
-            elif algorithm_selection == "DE":
-                offspring_population = self.binomial_crossover(binary=True)
-                self.parent_vs_child_selection(offspring_population)
-
-            self.pass_next_generation()
-                
+            self.step(algorithm_selection)
+            self.stop_reason = self.check_stopping_criteria()
+            if self.stop_reason is None:
+                self.check_restart()
+            if self.checkpoint_interval > 0 and self.generation_t % self.checkpoint_interval == 0:
+                self.save_checkpoint(self.checkpoint_path)
+            if self.stop_reason is not None:
+                break
+        else:
+            self.stop_reason = "max_generations"
+
+        self.generation_statistics.stop_reason = self.stop_reason
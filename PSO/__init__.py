@@ -1,3 +1,5 @@
 from .particle import *
 from .swarm import *
-from .pso import *
\ No newline at end of file
+from .pso import *
+from .array_pso import *
+from .multi_swarm import *
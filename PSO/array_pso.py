@@ -0,0 +1,85 @@
+import numpy as np
+from PSO import *
+
+
+class ArrayPSO(PSO):
+    """
+    Structure-of-arrays swarm: positions, velocities and personal bests are kept in contiguous (swarm_size, nvar) float
+    arrays with parallel objective values and (swarm_size, n_constraints) raw constraint values, instead of Particle
+    objects in two Swarms. gbest is still a Particle.
+
+    It reads the same config files as PSO and draws the same random numbers, so with the same seed it reproduces the
+    runs of PSO. Particle views are only created on demand (get_particles, get_lbests).
+    """
+    def create_swarm(self, swarm_size):
+        self.swarm_size = swarm_size
+        xmin = np.asarray(self.objective_function.get_xmin())
+        xmax = np.asarray(self.objective_function.get_xmax())
+        nvar = self.objective_function.get_nvar()
+        self.positions = xmin + self.rng.random((swarm_size, nvar)) * (xmax - xmin)
+        self.velocities = np.zeros((swarm_size, nvar)) # particles start at rest
+        self.objective_values = np.full(swarm_size, np.inf) # not evaluated yet
+        self.constraint_values = np.zeros((swarm_size, self.n_constraints))
+        self.lbest_positions = np.full((swarm_size, nvar), np.inf)
+        self.lbest_objective_values = np.full(swarm_size, np.inf) # worse than any particle
+        self.lbest_constraint_values = np.full((swarm_size, self.n_constraints), np.inf)
+        self.topology.build(swarm_size, self.rng)
+
+    def particle_view(self, x, objective_value, constraint_values, velocity=None):
+        particle = self.particle_factory.create_particle()
+        particle.set_x(x)
+        if velocity is not None:
+            particle.set_velocity(velocity)
+        particle.set_objective_value(objective_value)
+        particle.set_constraint_values(constraint_values)
+        return particle
+
+    def get_particles(self):
+        """
+        Returns Particle copies of the rows of the swarm, built from the stored values without evaluating again
+        """
+        return [self.particle_view(self.positions[i], self.objective_values[i], self.constraint_values[i], self.velocities[i])
+                for i in range(self.swarm_size)]
+
+    def get_lbests(self):
+        return [self.particle_view(self.lbest_positions[i], self.lbest_objective_values[i], self.lbest_constraint_values[i])
+                for i in range(self.swarm_size)]
+
+    def get_positions(self):
+        return self.positions
+
+    def get_velocities(self):
+        return self.velocities
+
+    def get_objective_values(self):
+        return self.objective_values
+
+    def get_constraint_values(self):
+        return self.constraint_values
+
+    def get_lbest_positions(self):
+        return self.lbest_positions
+
+    def get_lbest_objective_values(self):
+        return self.lbest_objective_values
+
+    def get_lbest_constraint_values(self):
+        return self.lbest_constraint_values
+
+    def set_swarm(self, positions, velocities):
+        self.positions = np.array(positions, dtype=float)
+        self.velocities = np.array(velocities, dtype=float)
+
+    def set_evaluations(self, objective_values, constraint_values):
+        self.objective_values = np.array(objective_values, dtype=float)
+        self.constraint_values = np.array(constraint_values, dtype=float).reshape(self.swarm_size, self.n_constraints)
+
+    def set_lbests(self, positions, objective_values, constraint_values, indices=None):
+        if indices is None:
+            self.lbest_positions = np.array(positions, dtype=float)
+            self.lbest_objective_values = np.array(objective_values, dtype=float)
+            self.lbest_constraint_values = np.array(constraint_values, dtype=float).reshape(self.swarm_size, self.n_constraints)
+        else:
+            self.lbest_positions[indices] = positions
+            self.lbest_objective_values[indices] = objective_values
+            self.lbest_constraint_values[indices] = constraint_values
@@ -0,0 +1,165 @@
+import configparser
+import multiprocessing
+import traceback
+import numpy as np
+from PSO import *
+
+
+def _synchronize_best(swarm, shared_best, lock, index):
+    """
+    Exchanges the global best of a swarm with the shared best: writes it if the swarm found a better one, adopts the
+    shared one if another swarm did. The shared block holds [owner swarm, objective value, raw constraint values,
+    position], compared with the current penalty schedule and constraint handling of the swarm.
+    """
+    n_constraints = swarm.n_constraints
+    with lock:
+        objective_value = shared_best[1]
+        constraint_values = shared_best[2:2 + n_constraints].copy()
+        shared_fitness, shared_violation = swarm.score(np.array([objective_value]), constraint_values[None])
+        gbest_fitness, gbest_violation = swarm.get_gbest_score()
+        if swarm.constraint_handling.less(gbest_fitness, gbest_violation, shared_fitness[0], shared_violation[0]):
+            shared_best[0] = index
+            shared_best[1] = swarm.gbest.get_objective_value()
+            shared_best[2:2 + n_constraints] = swarm.gbest.get_constraint_values()
+            shared_best[2 + n_constraints:] = swarm.gbest.get_x()
+        elif swarm.constraint_handling.less(shared_fitness[0], shared_violation[0], gbest_fitness, gbest_violation):
+            swarm.gbest.set_x(shared_best[2 + n_constraints:])
+            swarm.gbest.set_objective_value(objective_value)
+            swarm.gbest.set_constraint_values(constraint_values)
+
+
+def _swarm_worker(connection, shared_block, lock, swarm_class, swarm_args, seed, sync_interval, index):
+    """
+    Runs one swarm in its own process, synchronizing its global best with the shared block every sync_interval
+    generations and once more at the end, then replies with its results through the pipe and exits. An exception is
+    sent back as {"error": traceback} instead, and raised again by the driver.
+    """
+    try:
+        connection.send(_run_swarm(shared_block, lock, swarm_class, swarm_args, seed, sync_interval, index))
+    except Exception:
+        connection.send({"error": traceback.format_exc()})
+    connection.close()
+
+
+def _run_swarm(shared_block, lock, swarm_class, swarm_args, seed, sync_interval, index):
+    swarm = swarm_class(**swarm_args, seed=seed)
+    shared_best = np.frombuffer(shared_block, dtype=np.float64)
+
+    def synchronize(swarm):
+        if swarm.generation_t % sync_interval == 0:
+            _synchronize_best(swarm, shared_best, lock, index)
+
+    try:
+        swarm.run(callback=synchronize)
+        _synchronize_best(swarm, shared_best, lock, index)
+        return {
+            "generation_statistics": swarm.generation_statistics,
+            "evaluations": swarm.objective_function.evaluation_count
+        }
+    finally:
+        swarm.close()
+
+
+def _receive(connection, index):
+    """
+    Returns the reply of swarm index, raising the swarm's exception if it failed
+    """
+    try:
+        reply = connection.recv()
+    except EOFError:
+        raise RuntimeError(f"Swarm {index} exited without replying") from None
+    if "error" in reply:
+        raise RuntimeError(f"Swarm {index} failed:\n{reply['error']}")
+    return reply
+
+
+class MultiSwarmPSO:
+    """
+    Multi-swarm driver: N swarms run asynchronously in separate processes and share their best-known position through
+    a shared-memory block of float64, read and written under a lock. Every sync_interval generations each swarm
+    publishes its global best if it is better than the shared one, or adopts the shared one as its global best. With a
+    local topology the shared best only replaces the global best kept for statistics and stopping.
+
+    Settings are read from the optional [MultiSwarmSettings] section of the config file, keyword arguments override them:
+    - n_swarms (int): number of swarms (processes)
+    - sync_interval (int): generations between synchronizations with the shared best
+
+    Parameters:
+    - objective_function (str): name of the problem in Problems/problems.py
+    - swarm_class: PSO or ArrayPSO
+    - seed (int): seed of the whole run, every swarm gets its own np.random.SeedSequence spawned from it
+    """
+    def __init__(self, objective_function, config_file="inputs/param_swarm.cfg", n_var=2, swarm_class=ArrayPSO,
+                 seed=None, **swarm_settings):
+        self.objective_function = objective_function
+        self.config_file = config_file
+        self.n_var = n_var
+        self.swarm_class = swarm_class
+        self.seed = seed
+        self.load_config(config_file)
+        for key, value in swarm_settings.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Unknown multi-swarm setting {key}")
+            setattr(self, key, value)
+        if self.sync_interval < 1:
+            raise ValueError("sync_interval should be at least 1")
+        self.swarm_statistics = []
+
+    def load_config(self, config_file):
+        config = configparser.ConfigParser()
+        config.read(config_file)
+        self.n_swarms = config.getint('MultiSwarmSettings', 'n_swarms', fallback=0) or multiprocessing.cpu_count() # 0 uses every CPU
+        self.sync_interval = config.getint('MultiSwarmSettings', 'sync_interval', fallback=10)
+
+    def run(self):
+        """
+        Runs all swarms until every one of them reaches max_generations or a stopping criterion. Returns the best
+        position found across swarms.
+        """
+        problem = problems.FunctionFactory.select_function(self.objective_function, self.n_var)
+        nvar = problem.get_nvar()
+        n_constraints = problem.constraint_values_batch(np.atleast_2d(problem.get_xmin())).shape[1]
+
+        seeds = np.random.SeedSequence(self.seed).spawn(self.n_swarms)
+        swarm_args = {"objective_function": self.objective_function, "n_var": self.n_var, "config_file": self.config_file}
+        context = multiprocessing.get_context()
+        lock = context.Lock()
+        shared_block = context.RawArray('d', 2 + n_constraints + nvar)
+        shared_best = np.frombuffer(shared_block, dtype=np.float64)
+        shared_best[:] = np.inf # worse than any swarm
+        shared_best[0] = -1 # no owner yet
+
+        connections, processes = [], []
+        for i in range(self.n_swarms):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=_swarm_worker,
+                                      args=(child_connection, shared_block, lock, self.swarm_class, swarm_args, seeds[i],
+                                            self.sync_interval, i))
+            process.start()
+            child_connection.close() # the parent only keeps its end, so recv raises EOFError if the swarm dies
+            connections.append(parent_connection)
+            processes.append(process)
+
+        try:
+            results = [_receive(connection, i) for i, connection in enumerate(connections)]
+        except BaseException:
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+
+        self.swarm_statistics = [result["generation_statistics"] for result in results]
+        self.evaluations = sum(result["evaluations"] for result in results)
+        self.best_swarm = int(shared_best[0])
+        self.best_objective_value = shared_best[1]
+        self.best_constraint_values = shared_best[2:2 + n_constraints].copy()
+        self.best_position = shared_best[2 + n_constraints:].copy()
+        return self.best_position
+
+    def get_population_statistics(self):
+        """
+        Returns the GenerationStatistics of the swarm that found the shared best
+        """
+        return self.swarm_statistics[self.best_swarm]
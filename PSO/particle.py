@@ -1,11 +1,13 @@
 import numpy as np
 
 class Particle:
-    def __init__(self, objective_function):
+    def __init__(self, objective_function, rng):
         self.__obj_func_singleton = objective_function
+        self.rng = np.random.default_rng(rng) # random stream of the owning PSO, required so runs are reproducible
         self.x = np.empty(objective_function.get_nvar())       
-        self.velocity = np.empty(objective_function.get_nvar())
+        self.velocity = np.zeros(objective_function.get_nvar()) # particles start at rest
         self.objective_value = None
+        self.constraint_values = np.zeros(0) # raw constraint values g_j(x), scored by the PSO with its penalty schedule
     
     def get_x(self):
         return self.x
@@ -36,25 +38,32 @@ class Particle:
     
     def set_objective_value(self, objective_value):
         self.objective_value = objective_value
+
+    def get_constraint_values(self):
+        return self.constraint_values
+
+    def set_constraint_values(self, constraint_values):
+        self.constraint_values = np.array(constraint_values, dtype=float, copy=True)
     
     def evaluate_objective_function(self):
-        self.objective_value = self.__obj_func_singleton.evaluate(self.x)
+        self.objective_value, self.constraint_values = self.__obj_func_singleton.evaluate_raw(self.x)
     
-    def initialize_location(self, value=None):
+    def initialize_location(self, value=None, evaluate=True, n_constraints=0):
         if value is None:
-            self.x = np.empty(self.__obj_func_singleton.get_nvar())
-            xmin = self.__obj_func_singleton.get_xmin()
-            xmax = self.__obj_func_singleton.get_xmax()
-            for i in range(self.__obj_func_singleton.get_nvar()):
-                self.x[i] = xmin[i] + np.random.rand() * (xmax[i] - xmin[i])
-            self.objective_value = self.__obj_func_singleton.evaluate(self.x)
+            xmin = np.asarray(self.__obj_func_singleton.get_xmin())
+            xmax = np.asarray(self.__obj_func_singleton.get_xmax())
+            self.x = xmin + self.rng.random(self.__obj_func_singleton.get_nvar()) * (xmax - xmin)
+            if evaluate: # otherwise the swarm is evaluated later in a single batch
+                self.evaluate_objective_function()
         else:
             self.x = np.full(self.__obj_func_singleton.get_nvar(), np.inf)
             self.objective_value = value
+            self.constraint_values = np.full(n_constraints, value) # worse than any particle when value is np.inf
     
 class ParticleFactory:
-    def __init__(self, obj_func_singleton):
+    def __init__(self, obj_func_singleton, rng):
         self.__obj_func_singleton = obj_func_singleton
+        self.rng = rng
 
     def create_particle(self):
-        return Particle(self.__obj_func_singleton)
\ No newline at end of file
+        return Particle(self.__obj_func_singleton, self.rng)
\ No newline at end of file
@@ -2,22 +2,61 @@ import numpy as np
 from PSO import *
 import configparser
 from Problems import *
+from utils import *
 
 
-class PSO:
-    def __init__(self, objective_function, n_var=2, config_file = "inputs/param_swarm.cfg"):
+class PSO(RunControl):
+    """
+    Particle swarm optimization with a swarm of Particle objects and their personal bests in a second Swarm. Particles
+    are attracted by the global best or by neighborhood bests, see the [TopologySettings] of the config file.
+
+    Particles keep their raw objective and constraint values. Constrained problems are handled like in Population: with
+    the dynamic penalty of [PenaltySettings] in the fitness, or by the feasibility rules of [ConstraintSettings], and
+    personal and global bests are rescored with the current penalty schedule every generation.
+
+    Every generation is computed on (swarm_size, nvar) arrays: velocities and positions of the whole swarm are updated
+    with a few NumPy expressions, the swarm is evaluated in one batched call and the global best is the best personal
+    best. Particles are only read and written through the get_*/set_* methods, ArrayPSO stores the same state as arrays.
+    """
+    statistics_fields = [
+        ("best_fitness", np.float64), # Does not consider penalty
+        ("best_fitness_with_penalty", np.float64),
+        ("weighted_penalty", np.float64),
+        ("unweighted_penalty", np.float64),
+        ("num_violations", np.int64),
+        ("mean_fitness", np.float64),
+        ("std_fitness", np.float64),
+        ("worst_fitness", np.float64),
+        ("feasible_fraction", np.float64),
+        ("diversity", np.float64),
+        ("restarts", np.int64) # restarts so far, see restart
+    ]
+    inertia_schedules = ("constant", "linear", "constriction")
+
+    def __init__(self, objective_function, n_var=2, config_file = "inputs/param_swarm.cfg", stopping_criteria = None, seed = None):
         self.load_config(config_file)
+        self.penalty = not self.constraint_handling.lexicographic # the feasibility rules compare violations separately
+        self.rng = np.random.default_rng(seed) # every random number of the run is drawn from this stream
+        if stopping_criteria is not None:
+            self.stopping_criteria = stopping_criteria
+        self.stop_reason = None
         self.objective_function = problems.FunctionFactory.select_function(objective_function, n_var)
-        self.particle_factory = ParticleFactory(self.objective_function)       
-        self.swarm = Swarm(self.swarm_size, self.particle_factory)
-        self.lbest = Swarm(self.swarm_size, self.particle_factory)
+        self.evaluator = evaluators.create_evaluator(self.objective_function, self.evaluator_backend, self.evaluator_workers,
+                                                     self.evaluator_chunk_size)
+        self.objective_function = self.evaluator
+        if self.evaluation_cache_size > 0:
+            self.objective_function = evaluation_cache.CachedObjectiveFunction(self.objective_function, self.evaluation_cache_size)
+        self.n_constraints = self.objective_function.constraint_values_batch(np.atleast_2d(self.objective_function.get_xmin())).shape[1]
+        self.particle_factory = ParticleFactory(self.objective_function, self.rng)       
         self.gbest = self.particle_factory.create_particle()
-        # Initialization
-        self.gbest.initialize_location(np.inf)
-        self.swarm.initialize_swarm()
-        self.lbest.initialize_lbest_swarm()
-        self.generation_statistics = {}
         self.generation_t = 0
+        self.update_dynamic_factors()
+        # Initialization
+        self.gbest.initialize_location(np.inf, n_constraints=self.n_constraints)
+        self.create_swarm(self.swarm_size)
+        self.evaluate_swarm()
+        self.constraint_handling.start(self.get_constraint_violations())
+        self.generation_statistics = statistics.GenerationStatistics(self.statistics_fields, self.max_generations, self.statistics_ring_size)
     
     def load_config(self, config_file):
         config = configparser.ConfigParser()
@@ -28,57 +67,341 @@ class PSO:
         self.w = float(config['SwarmSettings']['inertia_factor']) 
         self.Vmax = float(config['SwarmSettings']['Vmax'])
         self.max_generations = int(config['SwarmSettings']['max_generations'])
+        self.vmax_fraction = read_optional(config, 'SwarmSettings', 'vmax_fraction', float) # empty uses the absolute Vmax
+        self.inertia = config.get('SwarmSettings', 'inertia', fallback='constant')
+        if self.inertia not in self.inertia_schedules:
+            raise ValueError(f"Inertia should be one of {self.inertia_schedules}, not {self.inertia}")
+        self.min_w = config.getfloat('SwarmSettings', 'min_inertia_factor', fallback=self.w) # final weight of the linear schedule
+        if self.inertia == "constriction":
+            phi = self.c1 + self.c2
+            if phi <= 4:
+                raise ValueError(f"The constriction factor needs c1 + c2 > 4, not {phi}")
+            self.chi = 2 / abs(2 - phi - np.sqrt(phi ** 2 - 4 * phi)) # Clerc and Kennedy
+        self.boundary_handling = boundary_handling.BoundaryHandling.from_config(config) # particles leaving [xmin, xmax]
+        self.evaluation_cache_size = config.getint('SwarmSettings', 'evaluation_cache_size', fallback=0) # 0 disables the cache
+        self.statistics_ring_size = config.getint('SwarmSettings', 'statistics_ring_size', fallback=0) # 0 keeps every generation
+        self.evaluator_backend = config.get('EvaluatorSettings', 'backend', fallback='serial')
+        self.evaluator_workers = config.getint('EvaluatorSettings', 'n_workers', fallback=0) or None # 0 uses every CPU
+        self.evaluator_chunk_size = config.getint('EvaluatorSettings', 'chunk_size', fallback=0) # 0 splits batches evenly across workers
+        self.checkpoint_interval = config.getint('CheckpointSettings', 'checkpoint_interval', fallback=0) # 0 disables periodic checkpoints
+        self.checkpoint_path = config.get('CheckpointSettings', 'checkpoint_path', fallback='checkpoint.npz')
+        # personal and global bests are compared by fitness with penalty (penalty) or by feasibility rules (feasibility, epsilon)
+        self.constraint_handling = constraint_handling.ConstraintHandling.from_config(config)
+        # dynamic penalty of constrained problems, same schedule as Population
+        self.max_penalty_exp = config.getfloat('PenaltySettings', 'max_penalty_exp', fallback=6)
+        self.min_penalty_exp = config.getfloat('PenaltySettings', 'min_penalty_exp', fallback=2)
+        self.max_penalty_factor = config.getfloat('PenaltySettings', 'max_penalty_factor', fallback=1.5)
+        self.min_penalty_factor = config.getfloat('PenaltySettings', 'min_penalty_factor', fallback=1)
+        self.max_tolerance_factor = config.getfloat('PenaltySettings', 'max_tolerance_factor', fallback=0.8)
+        self.min_tolerance_factor = config.getfloat('PenaltySettings', 'min_tolerance_factor', fallback=0.5)
+        self.stopping_criteria = stopping.StoppingCriteria.from_config(config)
+        self.restart_strategy = restart.RestartStrategy.from_config(config) # restarts on diversity collapse (optional)
+        self.topology = topology.Topology.from_config(config) # social component from the global or neighborhood bests
+
+    def create_swarm(self, swarm_size):
+        """
+        Creates swarm_size particles at random positions, not evaluated yet, with personal bests worse than any particle,
+        and the neighbor indices of the topology
+        """
+        self.swarm_size = swarm_size
+        self.swarm = Swarm(swarm_size, self.particle_factory)
+        self.lbest = Swarm(swarm_size, self.particle_factory)
+        self.swarm.initialize_swarm(evaluate=False)
+        self.lbest.initialize_lbest_swarm(self.n_constraints)
+        self.topology.build(swarm_size, self.rng)
+
+    def update_dynamic_factors(self):
+        progress = self.generation_t / self.max_generations
+        penalty_factor = self.min_penalty_factor + progress * (self.max_penalty_factor - self.min_penalty_factor)
+        tolerance_factor = self.max_tolerance_factor - progress * (self.max_tolerance_factor - self.min_tolerance_factor)
+        penalty_exp = self.min_penalty_exp + progress * (self.max_penalty_exp - self.min_penalty_exp)
+
+        self.objective_function.set_penalty_factors(penalty_factor, tolerance_factor, penalty_exp)
+        self.constraint_handling.update(progress)
+
+    def score(self, objective_values, constraint_values):
+        """
+        Returns (fitness, constraint_violation) vectors under the current penalty schedule. fitness includes the weighted
+        penalty with the penalty method, constraint_violation is the sum of violations.
+        """
+        weighted_penalty, unweighted_penalty, _ = self.objective_function.penalty_from_constraints(constraint_values)
+        if self.penalty: # penalty is included in fitness
+            return objective_values + weighted_penalty, unweighted_penalty
+        return objective_values, unweighted_penalty # fitness does not include penalty (feasibility rules)
+
+    def get_particles(self):
+        return [self.swarm.get_particle_at(i) for i in range(self.swarm.get_swarm_size())]
+
+    def get_lbests(self):
+        return [self.lbest.get_particle_at(i) for i in range(self.lbest.get_swarm_size())]
+
+    def get_positions(self):
+        return np.array([particle.get_x() for particle in self.get_particles()])
+
+    def get_velocities(self):
+        return np.array([particle.get_velocity() for particle in self.get_particles()])
+
+    def get_objective_values(self):
+        return np.array([particle.get_objective_value() for particle in self.get_particles()], dtype=float)
+
+    def get_constraint_values(self):
+        return np.array([particle.get_constraint_values() for particle in self.get_particles()], dtype=float).reshape(self.swarm_size, self.n_constraints)
+
+    def get_fitness(self):
+        return self.score(self.get_objective_values(), self.get_constraint_values())[0]
+
+    def get_constraint_violations(self):
+        return self.score(self.get_objective_values(), self.get_constraint_values())[1]
+
+    def get_lbest_positions(self):
+        return np.array([lbest.get_x() for lbest in self.get_lbests()])
+
+    def get_lbest_objective_values(self):
+        return np.array([lbest.get_objective_value() for lbest in self.get_lbests()], dtype=float)
+
+    def get_lbest_constraint_values(self):
+        return np.array([lbest.get_constraint_values() for lbest in self.get_lbests()], dtype=float).reshape(self.swarm_size, self.n_constraints)
+
+    def get_lbest_scores(self):
+        """
+        Returns the (fitness, constraint_violation) vectors of the personal bests under the current penalty schedule
+        """
+        return self.score(self.get_lbest_objective_values(), self.get_lbest_constraint_values())
+
+    def get_gbest_score(self):
+        fitness, constraint_violation = self.score(np.array([self.gbest.get_objective_value()], dtype=float), np.atleast_2d(self.gbest.get_constraint_values()))
+        return fitness[0], constraint_violation[0]
+
+    def set_swarm(self, positions, velocities):
+        """
+        Moves every particle to its row of positions with its row of velocities
+        """
+        for particle, x, velocity in zip(self.get_particles(), positions, velocities):
+            particle.set_x(x)
+            particle.set_velocity(velocity)
+
+    def set_evaluations(self, objective_values, constraint_values):
+        for particle, objective_value, constraint_value in zip(self.get_particles(), objective_values, constraint_values):
+            particle.set_objective_value(objective_value)
+            particle.set_constraint_values(constraint_value)
+
+    def set_lbests(self, positions, objective_values, constraint_values, indices=None):
+        """
+        Replaces the personal bests at the given indices (all if None) by the rows of positions, objective_values and
+        constraint_values
+        """
+        lbests = self.get_lbests()
+        indices = range(len(lbests)) if indices is None else indices
+        for i, x, objective_value, constraint_value in zip(indices, positions, objective_values, constraint_values):
+            lbests[i].set_x(x)
+            lbests[i].set_objective_value(objective_value)
+            lbests[i].set_constraint_values(constraint_value)
+
+    def evaluate_swarm(self):
+        """
+        Evaluates the current position of every particle in a single batched call through the evaluator
+        """
+        self.set_evaluations(*self.objective_function.evaluate_raw_batch(self.get_positions()))
+
+    def update_bests(self):
+        """
+        Updates the personal bests with the particles that improved on them and the global best with the best personal
+        best (argmin), comparing by fitness (with penalty) or by the feasibility rules of [ConstraintSettings] over the
+        whole swarm at once, under the current penalty schedule
+        """
+        lbest_fitness, lbest_constraint_violations = self.get_lbest_scores()
+        objective_values, constraint_values = self.get_objective_values(), self.get_constraint_values()
+        fitness, constraint_violations = self.score(objective_values, constraint_values)
+
+        improved = np.flatnonzero(self.constraint_handling.less(fitness, constraint_violations, lbest_fitness, lbest_constraint_violations))
+        self.set_lbests(self.get_positions()[improved], objective_values[improved], constraint_values[improved], improved)
+        lbest_fitness, lbest_constraint_violations = self.get_lbest_scores()
+
+        best = self.constraint_handling.best(lbest_fitness, lbest_constraint_violations)
+        gbest_improved = self.constraint_handling.less(lbest_fitness[best], lbest_constraint_violations[best], *self.get_gbest_score())
+        if gbest_improved:
+            self.gbest.set_x(self.get_lbest_positions()[best])
+            self.gbest.set_objective_value(self.get_lbest_objective_values()[best])
+            self.gbest.set_constraint_values(self.get_lbest_constraint_values()[best])
+        self.topology.update(gbest_improved, self.rng)
+
+    def get_social_positions(self):
+        """
+        Position that attracts every particle through the social component: the global best, or with a local topology
+        the best personal best in the neighborhood of the particle, one row per particle
+        """
+        if not self.topology.local:
+            return self.gbest.get_x()
+        selection_values = self.constraint_handling.selection_values(*self.get_lbest_scores())
+        return self.get_lbest_positions()[self.topology.neighborhood_bests(selection_values)]
+
+    def get_vmax(self):
+        """
+        Maximum speed of every dimension: vmax_fraction of the domain width, or the absolute Vmax if it is not set
+        """
+        if self.vmax_fraction is None:
+            return np.full(self.objective_function.get_nvar(), self.Vmax)
+        return self.vmax_fraction * (np.asarray(self.objective_function.get_xmax()) - np.asarray(self.objective_function.get_xmin()))
+
+    def get_inertia_weight(self):
+        """
+        Inertia weight of the current generation: constant, or decreasing linearly from inertia_factor to
+        min_inertia_factor over max_generations
+        """
+        if self.inertia == "linear":
+            return self.w - (self.w - self.min_w) * self.generation_t / self.max_generations
+        return self.w
+
+    def move_swarm(self):
+        """
+        Updates velocities (inertia weight or constriction factor, cognitive and social components, clamping to
+        [-Vmax, Vmax]) and positions of the whole swarm at once, then brings the particles that left the domain back with
+        the boundary handling. r1 and r2 are drawn once per dimension and shared by all particles.
+        """
+        positions, velocities = self.get_positions(), self.get_velocities()
+        r1, r2 = self.rng.random((2, self.objective_function.get_nvar()))
+        cognitive_comp = self.c1 * r1 * (self.get_lbest_positions() - positions)
+        social_comp = self.c2 * r2 * (self.get_social_positions() - positions)
+        if self.inertia == "constriction":
+            velocities = self.chi * (velocities + cognitive_comp + social_comp) # Constriction factor
+        else:
+            velocities = self.get_inertia_weight() * velocities + cognitive_comp + social_comp # Inertia weight
+        vmax = self.get_vmax()
+        velocities = np.clip(velocities, -vmax, vmax) # Velocity clamping
+        self.set_swarm(*self.boundary_handling.apply(positions + velocities, velocities, self.objective_function.get_xmin(),
+                                                     self.objective_function.get_xmax(), self.rng))
 
     def pass_next_generation(self):
+        """
+        Records statistics of the global best and of the whole swarm and moves the penalty schedule to the next generation
+        """
         best_fitness =  self.gbest.get_objective_value()
+        best_fitness_with_penalty = self.get_gbest_score()[0] # read before moving to the next schedule
+        weighted_penalty, unweighted_penalty, num_violations = self.objective_function.penalty_from_constraints(np.atleast_2d(self.gbest.get_constraint_values()))
+        constraint_values = self.get_constraint_values()
+        fitness, _ = self.score(self.get_objective_values(), constraint_values)
+        feasible_fraction = np.mean(self.objective_function.penalty_from_constraints(constraint_values)[2] == 0)
+        diversity = functions.genotypic_diversity(self.get_positions(), self.objective_function.get_xmin(), self.objective_function.get_xmax())
         
         self.generation_t += 1
+        self.update_dynamic_factors()
+
+        self.generation_statistics.record(
+            self.generation_t,
+            best_fitness=best_fitness,
+            best_fitness_with_penalty=best_fitness_with_penalty,
+            weighted_penalty=weighted_penalty[0],
+            unweighted_penalty=unweighted_penalty[0],
+            num_violations=num_violations[0],
+            mean_fitness=np.mean(fitness),
+            std_fitness=np.std(fitness),
+            worst_fitness=np.max(fitness),
+            feasible_fraction=feasible_fraction,
+            diversity=diversity,
+            restarts=self.restart_strategy.restarts
+        )
+
+    def restart(self):
+        """
+        Replaces the swarm by new random particles at rest, enlarged by pop_size_factor, with new personal bests. The
+        global best is kept and attracts the new swarm through the social component.
+        """
+        self.create_swarm(self.restart_strategy.next_pop_size(self.swarm_size))
+        self.evaluate_swarm()
+
+    def save_checkpoint(self, path):
+        """
+        Saves the state needed to resume the run to a compressed .npz file: positions, velocities and raw objective and
+        constraint values, personal and global bests, generation counter, statistics so far, stopping state and RNG state.
+        """
+        checkpoint.save_npz(
+            path,
+            positions=self.get_positions(),
+            velocities=self.get_velocities(),
+            objective_values=self.get_objective_values(),
+            constraint_values=self.get_constraint_values(),
+            lbest_positions=self.get_lbest_positions(),
+            lbest_objective_values=self.get_lbest_objective_values(),
+            lbest_constraint_values=self.get_lbest_constraint_values(),
+            gbest_position=self.gbest.get_x(),
+            gbest_objective_value=np.array(self.gbest.get_objective_value(), dtype=float),
+            gbest_constraint_values=np.array(self.gbest.get_constraint_values(), dtype=float),
+            generation_t=np.array(self.generation_t),
+            evaluation_count=np.array(self.objective_function.evaluation_count),
+            **checkpoint.prefixed("statistics", self.generation_statistics.get_state()),
+            **checkpoint.prefixed("stopping", self.stopping_criteria.get_state()),
+            **checkpoint.prefixed("constraint_handling", self.constraint_handling.get_state()),
+            **checkpoint.prefixed("restart", self.restart_strategy.get_state()),
+            **checkpoint.prefixed("topology", self.topology.get_state()),
+            **checkpoint.rng_state(self.rng)
+        )
 
-        self.generation_statistics[self.generation_t] = {
-            "best_fitness": best_fitness
-        }
+    def load_checkpoint(self, path):
+        """
+        Restores a state saved by save_checkpoint into a PSO built with the same problem and config file. Continue with
+        run(resume=True) to reproduce the uninterrupted run.
+        """
+        state = checkpoint.load_npz(path)
+        if len(state["positions"]) != self.swarm_size: # enlarged by restarts
+            self.create_swarm(len(state["positions"]))
+        self.set_swarm(state["positions"], state["velocities"])
+        self.set_evaluations(state["objective_values"], state["constraint_values"])
+        self.set_lbests(state["lbest_positions"], state["lbest_objective_values"], state["lbest_constraint_values"])
+        self.gbest.set_x(state["gbest_position"])
+        self.gbest.set_objective_value(state["gbest_objective_value"][()])
+        self.gbest.set_constraint_values(state["gbest_constraint_values"])
+        self.generation_t = int(state["generation_t"])
+        self.update_dynamic_factors()
+        self.evaluator.objective_function.evaluation_count = int(state["evaluation_count"]) # counted by the wrapped problem
+        self.generation_statistics.set_state(checkpoint.unprefixed("statistics", state))
+        self.stopping_criteria.set_state(checkpoint.unprefixed("stopping", state))
+        self.constraint_handling.set_state(checkpoint.unprefixed("constraint_handling", state))
+        if "restart_restarts" in state:
+            self.restart_strategy.set_state(checkpoint.unprefixed("restart", state))
+        if "topology_neighbors" in state:
+            self.topology.set_state(checkpoint.unprefixed("topology", state))
+        self.stop_reason = self.generation_statistics.stop_reason
+        checkpoint.set_rng_state(self.rng, state)
+
+    def close(self):
+        """
+        Shuts down the worker pool of the evaluator, if any. Workers are otherwise reused across generations and runs
+        """
+        self.evaluator.close()
 
-    def get_population_statistics(self):
+    def step(self):
         """
-        Returns dictionary with information about best individual across generations
+        Runs a single generation: best updates, velocity and position updates, batched evaluation and statistics
         """
-        return self.generation_statistics
+        self.update_bests()
+        self.move_swarm()
+        self.evaluate_swarm() # Calculate the objective values based on the new positions of the particles
+        self.pass_next_generation()
 
-    def run(self):
+    def run(self, resume=False, callback=None):
+        """
+        Runs the swarm until max_generations or one of the stopping criteria is reached, the reason is kept in stop_reason
+        and in the generation statistics. With [RestartSettings] the swarm restarts whenever its diversity collapses.
+
+        Parameters:
+        - resume (bool): continue after load_checkpoint without resetting the stopping criteria (wall clock, stagnation)
+        - callback (callable): called with the swarm after every generation, before the stopping criteria are checked
+        """
+        if not resume:
+            self.stopping_criteria.start()
+        self.stop_reason = None
         while self.generation_t  < self.max_generations:
-            for i in range(self.swarm.get_swarm_size()):
-                particle = self.swarm.get_particle_at(i)
-                particle_lbest = self.lbest.get_particle_at(i)
-                # Set the personal best position
-                if particle.get_objective_value() < particle_lbest.get_objective_value():
-                    particle_lbest.set_x(particle.get_x())
-                    particle_lbest.set_objective_value(particle.get_objective_value())
-                    
-                # Update the gBest position
-                if particle_lbest.get_objective_value() < self.gbest.get_objective_value():
-                    self.gbest.set_x(particle_lbest.get_x())
-                    self.gbest.set_objective_value(particle_lbest.get_objective_value())
-                    
-            # Random numbersfor the calculation of the velocity
-            r1 = np.random.rand(self.objective_function.get_nvar(), 1)
-            r2 = np.random.rand(self.objective_function.get_nvar(), 1)
-
-            # For each particle, update its velocity and position
-            for i in range(self.swarm.get_swarm_size()):
-                particle = self.swarm.get_particle_at(i) # x_i
-                lbest = self.lbest.get_particle_at(i) # y_i
-                # gbest = y^_i
-                for j in range(self.objective_function.get_nvar()):
-                    particle_j = particle.get_x_at(j)
-                    lbest_j =  lbest.get_x_at(j)
-                    gbest_j = self.gbest.get_x_at(j)
-                    cognitive_comp = self.c1 * r1[j] * (lbest_j - particle_j)
-                    social_comp = self.c2 * r2[j] * (gbest_j - particle_j)
-                    veloc_0 = particle.get_velocity_at(j)
-                    veloc = self.w * veloc_0 + cognitive_comp + social_comp # Inertia weight
-                    veloc = min(veloc, self.Vmax) # Velocity clamping
-                    value = particle_j + veloc
-                    particle.set_velocity_at(veloc,j) # Saving new velocity
-                    particle.set_x_at(value, j) # value is the new position for the j-th component of the particle
-                particle.evaluate_objective_function() # Calculate the objective value based on the new position of the particle
-            self.pass_next_generation()
\ No newline at end of file
+            self.step()
+            if callback is not None:
+                callback(self)
+            self.stop_reason = self.check_stopping_criteria()
+            if self.stop_reason is None:
+                self.check_restart()
+            if self.checkpoint_interval > 0 and self.generation_t % self.checkpoint_interval == 0:
+                self.save_checkpoint(self.checkpoint_path)
+            if self.stop_reason is not None:
+                break
+        else:
+            self.stop_reason = "max_generations"
+
+        self.generation_statistics.stop_reason = self.stop_reason
@@ -16,14 +16,14 @@ class Swarm:
     def get_particle_at(self, index):
         return self.swarm[index]
     
-    def initialize_lbest_swarm(self):
+    def initialize_lbest_swarm(self, n_constraints=0):
         for i in range(self.swarm_size):
             particle = self.particle_factory.create_particle()
-            particle.initialize_location(np.inf)
+            particle.initialize_location(np.inf, n_constraints=n_constraints)
             self.add_particle_at(i, particle)
     
-    def initialize_swarm(self):
+    def initialize_swarm(self, evaluate=True):
         for i in range(self.swarm_size):
             particle = self.particle_factory.create_particle()
-            particle.initialize_location()
+            particle.initialize_location(evaluate=evaluate)
             self.add_particle_at(i, particle)
\ No newline at end of file
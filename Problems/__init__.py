@@ -1 +1,3 @@
-from .problems import *
\ No newline at end of file
+from .problems import *
+from .evaluation_cache import *
+from .evaluators import *
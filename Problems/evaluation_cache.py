@@ -0,0 +1,124 @@
+import numpy as np
+from collections import OrderedDict
+
+
+class EvaluationCache:
+    """
+    Size-bounded LRU cache for evaluation results, keyed by the bytes of the gene vector.
+
+    Parameters:
+    - max_size (int): maximum number of entries kept, the least recently used one is evicted first
+    """
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(x, *extra):
+        return (np.ascontiguousarray(x, dtype=float).tobytes(),) + extra
+
+    def get(self, key):
+        """
+        Returns the cached value or None, counting the lookup as a hit or a miss
+        """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_statistics(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0
+        }
+
+
+class CachedObjectiveFunction:
+    """
+    Wraps an ObjectiveFunction so identical genomes are never evaluated twice.
+
+    evaluate and the raw evaluations are cached by gene bytes only, evaluate_penalty also by the penalty_version of the
+    wrapped objective function, so a schedule change never returns a stale penalty. Every other attribute (bounds, penalty
+    factors, penalty_from_constraints...) is forwarded to the wrapped objective function.
+    """
+    def __init__(self, objective_function, max_size=10000):
+        self.objective_function = objective_function
+        self.cache = EvaluationCache(max_size)
+
+    def __getattr__(self, name):
+        if name == "objective_function": # not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.objective_function, name)
+
+    def evaluate(self, x):
+        key = EvaluationCache.make_key(x, "evaluate")
+        value = self.cache.get(key)
+        if value is None:
+            value = self.objective_function.evaluate(x)
+            self.cache.put(key, value)
+        return value
+
+    def evaluate_penalty(self, x):
+        key = EvaluationCache.make_key(x, "penalty", self.objective_function.penalty_version)
+        value = self.cache.get(key)
+        if value is None:
+            value = self.objective_function.evaluate_penalty(x)
+            self.cache.put(key, value)
+        return value
+
+    def evaluate_raw(self, x):
+        objective_values, constraint_values = self.evaluate_raw_batch(x)
+        return objective_values[0], constraint_values[0]
+
+    def evaluate_raw_batch(self, X):
+        """
+        Looks every row up in the cache and evaluates only the misses, in a single batched call
+        """
+        X = np.atleast_2d(X)
+        keys = [EvaluationCache.make_key(x, "raw") for x in X]
+        cached = [self.cache.get(key) for key in keys]
+        missing = {} # key -> rows waiting for it, so duplicates inside the batch are evaluated once
+        for i, value in enumerate(cached):
+            if value is None:
+                missing.setdefault(keys[i], []).append(i)
+
+        if missing:
+            # only the first row of each group is evaluated, the duplicates are saved evaluations like cache hits
+            duplicates = sum(len(indices) - 1 for indices in missing.values())
+            self.cache.misses -= duplicates
+            self.cache.hits += duplicates
+            rows = [indices[0] for indices in missing.values()]
+            objective_values, constraint_values = self.objective_function.evaluate_raw_batch(X[rows])
+            for j, (key, indices) in enumerate(missing.items()):
+                value = (objective_values[j], constraint_values[j])
+                self.cache.put(key, value)
+                for i in indices:
+                    cached[i] = value
+
+        n_constraints = len(cached[0][1]) if cached else 0
+        objective_values = np.array([value[0] for value in cached], dtype=float)
+        constraint_values = np.array([value[1] for value in cached], dtype=float).reshape(len(X), n_constraints)
+        return objective_values, constraint_values
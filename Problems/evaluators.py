@@ -0,0 +1,130 @@
+import math
+import os
+import numpy as np
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+def _evaluate_raw_chunk(objective_function, X):
+    return objective_function.evaluate_batch(X), objective_function.constraint_values_batch(X)
+
+
+_worker_objective_function = None
+
+def _initialize_worker(objective_function):
+    """
+    Process pool initializer, the problem instance is sent to each worker once at startup
+    """
+    global _worker_objective_function
+    _worker_objective_function = objective_function
+
+def _evaluate_chunk_in_worker(X):
+    return _evaluate_raw_chunk(_worker_objective_function, X)
+
+
+class SerialEvaluator:
+    """
+    Evaluates batches inline. Evaluators wrap an ObjectiveFunction: raw batch evaluations go through the back end and
+    every other attribute (bounds, penalty schedule, penalty_from_constraints...) is forwarded to the wrapped problem.
+    """
+    def __init__(self, objective_function):
+        self.objective_function = objective_function
+
+    def __getattr__(self, name):
+        if name == "objective_function": # not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.objective_function, name)
+
+    def evaluate_raw_batch(self, X):
+        return self.objective_function.evaluate_raw_batch(X)
+
+    def evaluate_raw(self, x):
+        objective_values, constraint_values = self.evaluate_raw_batch(x)
+        return objective_values[0], constraint_values[0]
+
+    def close(self):
+        pass
+
+
+class PoolEvaluator(SerialEvaluator, metaclass=ABCMeta):
+    """
+    Base for the pooled back ends: batches are split into chunks that are evaluated concurrently and concatenated back
+    in order. The pool is created on first use and reused across generations until close().
+
+    Parameters:
+    - n_workers (int): number of workers, None uses every CPU
+    - chunk_size (int): rows per task, 0 splits every batch evenly across the workers
+    """
+    def __init__(self, objective_function, n_workers=None, chunk_size=0):
+        super().__init__(objective_function)
+        self.n_workers = n_workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.executor = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["executor"] = None # pools are not picklable, a copy starts its own on first use
+        return state
+
+    @abstractmethod
+    def create_executor(self):
+        pass
+
+    @abstractmethod
+    def submit_chunk(self, X):
+        pass
+
+    def evaluate_raw_batch(self, X):
+        X = np.atleast_2d(X)
+        if self.executor is None:
+            self.executor = self.create_executor()
+        n_chunks = self.n_workers if self.chunk_size <= 0 else math.ceil(len(X) / self.chunk_size)
+        chunks = np.array_split(X, max(1, min(n_chunks, len(X))))
+        results = [future.result() for future in [self.submit_chunk(chunk) for chunk in chunks]]
+
+        self.objective_function.evaluation_count += len(X)
+        return np.concatenate([result[0] for result in results]), np.concatenate([result[1] for result in results])
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+class ThreadPoolEvaluator(PoolEvaluator):
+    """
+    Evaluates chunks in a thread pool, useful when the objective releases the GIL (NumPy, I/O, external simulators)
+    """
+    def create_executor(self):
+        return ThreadPoolExecutor(max_workers=self.n_workers)
+
+    def submit_chunk(self, X):
+        return self.executor.submit(_evaluate_raw_chunk, self.objective_function, X)
+
+
+class ProcessPoolEvaluator(PoolEvaluator):
+    """
+    Evaluates chunks in a process pool, the problem instance is sent once to each worker by the pool initializer
+    """
+    def create_executor(self):
+        return ProcessPoolExecutor(max_workers=self.n_workers, initializer=_initialize_worker, initargs=(self.objective_function,))
+
+    def submit_chunk(self, X):
+        return self.executor.submit(_evaluate_chunk_in_worker, X)
+
+
+evaluator_backends = {
+    "serial": SerialEvaluator,
+    "thread": ThreadPoolEvaluator,
+    "process": ProcessPoolEvaluator
+}
+
+def create_evaluator(objective_function, backend="serial", n_workers=None, chunk_size=0):
+    """
+    Wraps objective_function in the evaluator of the given back end ("serial", "thread" or "process")
+    """
+    if backend not in evaluator_backends:
+        raise ValueError(f"Unknown evaluator backend {backend}, should be one of {list(evaluator_backends)}")
+    if backend == "serial":
+        return SerialEvaluator(objective_function)
+    return evaluator_backends[backend](objective_function, n_workers=n_workers, chunk_size=chunk_size)
@@ -2,6 +2,8 @@ import numpy as np
 
 from abc import ABCMeta, abstractmethod
 class ObjectiveFunction(metaclass=ABCMeta):
+    tolerance_offsets = None # sign of tolerance_factor added to each constraint (relaxed equality constraints)
+
     def __init__(self, nvar):
         self.nvar = nvar
         self.xmin = np.empty(nvar)
@@ -10,11 +12,30 @@ class ObjectiveFunction(metaclass=ABCMeta):
         self.set_xmax()
         self.penalty_factor = 1
         self.tolerance_factor = None
+        self.penalty_exp = 2
+        self.penalty_version = 0 # increases every time the penalty schedule changes
+        self.evaluation_count = 0 # individuals evaluated through evaluate_raw / evaluate_raw_batch
         
     @abstractmethod
     def evaluate(self, x):
         pass
 
+    def evaluate_batch(self, X):
+        """
+        Evaluates a whole population at once.
+
+        Parameters:
+        - X (np.ndarray): (pop, nvar) array, one individual per row
+
+        Returns:
+        - np.ndarray: (pop,) vector of objective values
+
+        Built-in problems override this with a vectorized version, user-defined problems fall back to calling
+        evaluate row by row.
+        """
+        X = np.atleast_2d(X)
+        return np.array([self.evaluate(x) for x in X], dtype=float).reshape(len(X))
+
     @abstractmethod
     def set_xmin(self):
         pass
@@ -31,6 +52,7 @@ class ObjectiveFunction(metaclass=ABCMeta):
         self.penalty_factor = penalty_factor
         self.tolerance_factor = tolerance_factor
         self.penalty_exp = penalty_exp
+        self.penalty_version += 1
 
     def get_nvar(self):
         return self.nvar
@@ -47,23 +69,115 @@ class ObjectiveFunction(metaclass=ABCMeta):
     def get_xmax_at(self, index):
         return self.xmax[index]
 
-    def evaluate_penalty(self,x):
-        if hasattr(self, 'constraint_penalty') and callable(getattr(self, 'constraint_penalty')):
-            violations, num_violations = self.constraint_penalty(x)
+    def has_constraints(self):
+        return hasattr(self, 'constraint_penalty') and callable(getattr(self, 'constraint_penalty'))
+
+    def constraint_values_batch(self, X):
+        """
+        Returns the raw value g_j(x) of every constraint for a whole population, g_j(x) > 0 means the constraint is violated.
+
+        Parameters:
+        - X (np.ndarray): (pop, nvar) array, one individual per row
+
+        Returns:
+        - np.ndarray: (pop, n_constraints) array (n_constraints = 0 for unconstrained problems)
+
+        User-defined problems that only provide the scalar constraint_penalty fall back to calling it row by row.
+        """
+        X = np.atleast_2d(X)
+        if self.has_constraints():
+            return np.array([self.constraint_penalty(x)[0] for x in X], dtype=float).reshape(len(X), -1)
+        return np.zeros((len(X), 0))
+
+    def violations_from_constraints(self, constraint_values):
+        """
+        Turns raw constraint values into violations max(0, g_j(x)), shifting the relaxed equality constraints by the current
+        tolerance factor first.
+        """
+        if self.tolerance_offsets is not None and self.tolerance_factor is not None:
+            constraint_values = constraint_values + self.tolerance_offsets * self.tolerance_factor
+        return np.maximum(0, constraint_values)
+
+    def penalty_from_constraints(self, constraint_values):
+        """
+        Applies the current penalty schedule to a (pop, n_constraints) array of raw constraint values.
+
+        Returns:
+        - tuple: (weighted_penalty, unweighted_penalty, num_violations), each a (pop,) vector
+        """
+        violations = self.violations_from_constraints(np.atleast_2d(constraint_values))
+        not_weighted_penalty = np.sum(violations, axis=1)
+        weighted_penalty = self.penalty_factor * np.sum((1 + violations) ** self.penalty_exp, axis=1)
+        num_violations = np.count_nonzero(violations > 0, axis=1)
+        return weighted_penalty, not_weighted_penalty, num_violations
+
+    def constraint_violations_batch(self, X):
+        """
+        Returns the (pop, n_constraints) violation array of a whole population.
+        """
+        return self.violations_from_constraints(self.constraint_values_batch(X))
 
-            not_weighted_penalty = sum(violations) 
-            weighted_penalty = self.penalty_factor * sum((1+violation)**self.penalty_exp for violation in violations) # squared
-            return weighted_penalty, not_weighted_penalty, num_violations
+    def evaluate_penalty_batch(self, X):
+        """
+        Batched counterpart of evaluate_penalty, returns (weighted_penalty, unweighted_penalty, num_violations) vectors
+        """
+        return self.penalty_from_constraints(self.constraint_values_batch(X))
+
+    def evaluate_raw_batch(self, X):
+        """
+        Evaluates the objective and the raw constraint values of a whole population, independently of the penalty schedule.
+
+        Returns:
+        - tuple: ((pop,) objective values, (pop, n_constraints) raw constraint values)
+        """
+        X = np.atleast_2d(X)
+        self.evaluation_count += len(X)
+        return self.evaluate_batch(X), self.constraint_values_batch(X)
+
+    def evaluate_raw(self, x):
+        """
+        Single-individual version of evaluate_raw_batch, returns (objective value, (n_constraints,) raw constraint values)
+        """
+        objective_values, constraint_values = self.evaluate_raw_batch(x)
+        return objective_values[0], constraint_values[0]
+
+    def evaluate_penalty(self,x):
+        if self.has_constraints():
+            weighted_penalty, not_weighted_penalty, num_violations = self.evaluate_penalty_batch(x)
+            return weighted_penalty[0], not_weighted_penalty[0], num_violations[0]
         else:
             return (0,0,0)
 
+
+class ConstrainedObjectiveFunction(ObjectiveFunction):
+    """
+    Base for problems whose constraints are written in vectorized form, constraint_penalty is derived from
+    constraint_values_batch.
+    """
+    @abstractmethod
+    def constraint_values_batch(self, X):
+        pass
+
+    def constraint_penalty(self, x):
+        """
+        Returns a tuple with the violation of every constraint and the number of violations
+        """
+        violations = self.constraint_violations_batch(x)[0]
+        num_violations = int(np.count_nonzero(violations))
+
+        return violations, num_violations
+
 class sphere(ObjectiveFunction):        
     def evaluate(self, x):
         result = 0.0
         for i in range(self.nvar):
             result = result + x[i] ** 2
         return result
-    
+
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        return np.sum(X ** 2, axis=1)
+
     def set_xmin(self):
         for i in range(self.nvar):
             self.xmin[i] = -5.0
@@ -84,7 +198,14 @@ class Layeb05(ObjectiveFunction):
             B = np.cos(2*x[i]-x[i+1]+np.pi/2)
             result = result + np.log(np.abs(A) + 0.001 )/ (np.abs(B) + 1)
         return result
-    
+
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        xi, xj = X[:, :-1], X[:, 1:]
+        A = np.sin((xi - np.pi/2)) + np.cos(xj - np.pi)
+        B = np.cos(2*xi - xj + np.pi/2)
+        return np.sum(np.log(np.abs(A) + 0.001) / (np.abs(B) + 1), axis=1)
+
     def set_xmin(self):
         for i in range(self.nvar):
             self.xmin[i] = -10
@@ -104,7 +225,14 @@ class Layeb10(ObjectiveFunction):
             B = 100 * np.sin(x[i] + x[i+1])
             result = result + A ** 2 + np.abs(B)
         return result
-    
+
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        xi, xj = X[:, :-1], X[:, 1:]
+        A = np.log(xi**2 + xj**2 + 0.5)
+        B = 100 * np.sin(xi + xj)
+        return np.sum(A ** 2 + np.abs(B), axis=1)
+
     def set_xmin(self):
         for i in range(self.nvar):
             self.xmin[i] = -10
@@ -124,7 +252,14 @@ class Layeb15(ObjectiveFunction):
             B = np.exp(x[i]*x[i+1]+1)-1
             result = result + 10*A + np.abs(B)
         return result
-    
+
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        xi, xj = X[:, :-1], X[:, 1:]
+        A = np.sqrt(np.tanh(2*np.abs(xi) - xj ** 2 - 1))
+        B = np.exp(xi*xj + 1) - 1
+        return np.sum(10*A + np.abs(B), axis=1)
+
     def set_xmin(self):
         for i in range(self.nvar):
             self.xmin[i] = -100
@@ -144,7 +279,14 @@ class Layeb18(ObjectiveFunction):
             B = np.sin(x[i]+x[i+1])*np.cos([x[i]])
             result = result + np.log(A + 0.001) / (np.abs(B) + 1)
         return result
-    
+
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        xi, xj = X[:, :-1], X[:, 1:]
+        A = np.cos(2*xi*xj/np.pi)
+        B = np.sin(xi + xj)*np.cos(xi)
+        return np.sum(np.log(A + 0.001) / (np.abs(B) + 1), axis=1)
+
     def set_xmin(self):
         for i in range(self.nvar):
             self.xmin[i] = -10
@@ -163,7 +305,11 @@ class rastringin(ObjectiveFunction):
             result = result + x[i]*x[i] - 10*np.cos(2*np.pi*x[i])
         result = result + 10*self.nvar
         return result
-    
+
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        return np.sum(X*X - 10*np.cos(2*np.pi*X), axis=1) + 10*self.nvar
+
     def set_xmin(self):
         for i in range(self.nvar):
             self.xmin[i] = -5.12
@@ -181,7 +327,12 @@ class rosenbrock(ObjectiveFunction):
         for i in range(self.nvar - 1):
             result = result + 100*np.power(x[i + 1] - x[i]*x[i], 2) + np.power(1 - x[i], 2)
         return result
-    
+
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        xi, xj = X[:, :-1], X[:, 1:]
+        return np.sum(100*np.power(xj - xi*xi, 2) + np.power(1 - xi, 2), axis=1)
+
     def set_xmin(self):
         for i in range(self.nvar):
             self.xmin[i] = -10.0
@@ -193,7 +344,7 @@ class rosenbrock(ObjectiveFunction):
     def get_name(self):
         return rosenbrock.__name__
 
-class G1(ObjectiveFunction):
+class G1(ConstrainedObjectiveFunction):
     def __init__(self):
         super().__init__(nvar=13)
 
@@ -204,7 +355,14 @@ class G1(ObjectiveFunction):
 
         result = term1 + term2 + term3
         return result
-    
+
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        term1 = 5 * np.sum(X[:, 0:4], axis=1)
+        term2 = -5 * np.sum(np.power(X[:, 0:4], 2), axis=1)
+        term3 = -np.sum(X[:, 4:13], axis=1)
+        return term1 + term2 + term3
+
     def set_xmin(self):
         for i in range(self.nvar):
             self.xmin[i] = 0.0
@@ -216,31 +374,24 @@ class G1(ObjectiveFunction):
             self.xmax[i] = 100.0
         self.xmax[12] = 1.0
 
-    def constraint_penalty(self, x):
-        """
-        Returns a tuple with the total penalty (weighted by the penalty factor), penalty (not weighted by penalty factor), number of violations
-        """
-        constraints = [
-            lambda x: 2 * x[0] + 2 * x[1] + x[9] + x[10] - 10,
-            lambda x: 2 * x[0] + 2 * x[2] + x[9] + x[11] - 10,
-            lambda x: 2 * x[1] + 2 * x[2] + x[10] + x[11] - 10,
-            lambda x: 8 * x[0] + x[9],
-            lambda x: -8 * x[1] + x[10],
-            lambda x: 8 * x[2] + x[11],
-            lambda x: -2 * x[3] - x[4] + x[9],
-            lambda x: -2 * x[5] - x[6] + x[10],
-            lambda x: -2 * x[7] - x[8] + x[11]
-        ]
-
-        violations = [max(0, constraint(x)) for constraint in constraints]
-        num_violations = sum(1 for v in violations if v > 0)
-        
-        return violations, num_violations
+    def constraint_values_batch(self, X):
+        X = np.atleast_2d(X)
+        return np.stack([
+            2 * X[:, 0] + 2 * X[:, 1] + X[:, 9] + X[:, 10] - 10,
+            2 * X[:, 0] + 2 * X[:, 2] + X[:, 9] + X[:, 11] - 10,
+            2 * X[:, 1] + 2 * X[:, 2] + X[:, 10] + X[:, 11] - 10,
+            8 * X[:, 0] + X[:, 9],
+            -8 * X[:, 1] + X[:, 10],
+            8 * X[:, 2] + X[:, 11],
+            -2 * X[:, 3] - X[:, 4] + X[:, 9],
+            -2 * X[:, 5] - X[:, 6] + X[:, 10],
+            -2 * X[:, 7] - X[:, 8] + X[:, 11]
+        ], axis=1)
 
     def get_name(self):
         return G1.__name__
 
-class G4(ObjectiveFunction):
+class G4(ConstrainedObjectiveFunction):
     def __init__(self):
         super().__init__(nvar=5)
 
@@ -249,25 +400,16 @@ class G4(ObjectiveFunction):
 
         return result
 
-    def constraint_penalty(self, x):
-        """
-        Returns a tuple with the total penalty (weighted by the penalty factor), penalty (not weighted by penalty factor), number of violations
-        """
-        penalty = 0
-        
-        constraints = [
-            lambda x: 85.334407 + 0.0056858 * x[1] * x[4] + 0.00026 * x[0] * x[3] - 0.0022053 * x[2] * x[4] - 92,
-            lambda x: - (85.334407 + 0.0056858 * x[1] * x[4] + 0.00026 * x[0] * x[3] - 0.0022053 * x[2] * x[4]),
-            lambda x: 90 - (80.51249 + 0.0071317 * x[1] * x[4] + 0.0029955 * x[0] * x[1] + 0.0021813 * np.power(x[2], 2)),
-            lambda x: 80.51249 + 0.0071317 * x[1] * x[4] + 0.0029955 * x[0] * x[1] + 0.0021813 * np.power(x[2], 2)-110,
-            lambda x: 20 - (9.300961 + 0.0047026 * x[2] * x[4] + 0.0012547 * x[0] * x[2] + 0.0019085 * x[2] * x[3]),
-            lambda x: 9.300961 + 0.0047026 * x[2] * x[4] + 0.0012547 * x[0] * x[2] + 0.0019085 * x[2] * x[3] - 25
-        ]
-        
-        violations = [max(0, constraint(x)) for constraint in constraints]
-        num_violations = sum(1 for v in violations if v > 0)
-        
-        return violations, num_violations
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        return 5.3578547 * np.power(X[:, 2], 2) + 0.8356891 * X[:, 0] * X[:, 4] + 37.293239 * X[:, 0] - 40792.141
+
+    def constraint_values_batch(self, X):
+        X = np.atleast_2d(X)
+        h1 = 85.334407 + 0.0056858 * X[:, 1] * X[:, 4] + 0.00026 * X[:, 0] * X[:, 3] - 0.0022053 * X[:, 2] * X[:, 4]
+        h2 = 80.51249 + 0.0071317 * X[:, 1] * X[:, 4] + 0.0029955 * X[:, 0] * X[:, 1] + 0.0021813 * np.power(X[:, 2], 2)
+        h3 = 9.300961 + 0.0047026 * X[:, 2] * X[:, 4] + 0.0012547 * X[:, 0] * X[:, 2] + 0.0019085 * X[:, 2] * X[:, 3]
+        return np.stack([h1 - 92, -h1, 90 - h2, h2 - 110, 20 - h3, h3 - 25], axis=1)
 
     def set_xmin(self):
         self.xmin = np.array([78.0, 33.0, 27.0, 27.0, 27.0])
@@ -278,7 +420,9 @@ class G4(ObjectiveFunction):
     def get_name(self):
         return G4.__name__
 
-class G5(ObjectiveFunction):
+class G5(ConstrainedObjectiveFunction):
+    tolerance_offsets = np.array([0, 0, -1, 1, -1, 1])
+
     def __init__(self):
         super().__init__(nvar=4)
 
@@ -287,25 +431,19 @@ class G5(ObjectiveFunction):
 
         return result
 
-    def constraint_penalty(self, x):
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        return 3 * X[:, 0] + 0.000001 * np.power(X[:, 0], 3) + 2 * X[:, 1] + 0.000002 / 3 * np.power(X[:, 2], 3)
+
+    def constraint_values_batch(self, X):
         """
-        Returns a tuple with the total penalty (weighted by the penalty factor and with tolerance), penalty (not weighted by penalty factor
-        nor with tolerance), number of violations (without tolerance)
+        Constraints 3 to 6 are the relaxed equality constraints, their tolerance is applied through tolerance_offsets
         """
-        penalty = 0
-        constraints = [
-            lambda x: - (x[3] - x[2] + 0.55),
-            lambda x: - (x[2] - x[3] + 0.55),
-            lambda x: 1000 * np.sin(-x[2] - 0.25) + 1000 * np.sin(-x[3] - 0.25) + 894.8 - x[0] - self.tolerance_factor,
-            lambda x: - (1000 * np.sin(-x[2] - 0.25) + 1000 * np.sin(-x[3] - 0.25) + 894.8 - x[0]) + self.tolerance_factor,
-            lambda x: 1000 * np.sin(x[2] - 0.25) + 1000 * np.sin(x[3] - 0.25) + 894.8 - x[1] - self.tolerance_factor,
-            lambda x: - (1000 * np.sin(x[3] - 0.25) + 1000 * np.sin(x[2] - 0.25) + 1294.8) + self.tolerance_factor
-        ]
-        
-        violations = [max(0, constraint(x)) for constraint in constraints]
-        num_violations = sum(1 for v in violations if v > 0)
-        
-        return violations, num_violations
+        X = np.atleast_2d(X)
+        h1 = 1000 * np.sin(-X[:, 2] - 0.25) + 1000 * np.sin(-X[:, 3] - 0.25) + 894.8 - X[:, 0]
+        h2 = 1000 * np.sin(X[:, 2] - 0.25) + 1000 * np.sin(X[:, 3] - 0.25) + 894.8 - X[:, 1]
+        h3 = 1000 * np.sin(X[:, 3] - 0.25) + 1000 * np.sin(X[:, 2] - 0.25) + 1294.8
+        return np.stack([-(X[:, 3] - X[:, 2] + 0.55), -(X[:, 2] - X[:, 3] + 0.55), h1, -h1, h2, -h3], axis=1)
 
     def set_xmin(self):
         self.xmin = np.array([0, 0, -0.55, -0.55])
@@ -316,30 +454,25 @@ class G5(ObjectiveFunction):
     def get_name(self):
         return G5.__name__
 
-class G6(ObjectiveFunction):
+class G6(ConstrainedObjectiveFunction):
     def __init__(self):
         super().__init__(nvar=2)
 
     def evaluate(self, x):
         result = np.power((x[0] - 10), 3) + np.power((x[1] - 20), 3)
 
-        return result 
-
-    def constraint_penalty(self, x):
-        """
-        Returns a tuple with the total penalty (weighted by the penalty factor), penalty (not weighted by penalty factor), number of violations
-        """
-        penalty = 0
+        return result
 
-        constraints = [
-            lambda x: -(x[0] - 5) ** 2 - (x[1] - 5) ** 2 + 100,
-            lambda x: +(x[0] - 6) ** 2 + (x[1] - 5) ** 2 - 82.81
-        ]
+    def evaluate_batch(self, X):
+        X = np.atleast_2d(X)
+        return np.power((X[:, 0] - 10), 3) + np.power((X[:, 1] - 20), 3)
 
-        violations = [max(0, constraint(x)) for constraint in constraints]
-        num_violations = sum(1 for v in violations if v > 0)
-        
-        return violations, num_violations
+    def constraint_values_batch(self, X):
+        X = np.atleast_2d(X)
+        return np.stack([
+            -(X[:, 0] - 5) ** 2 - (X[:, 1] - 5) ** 2 + 100,
+            +(X[:, 0] - 6) ** 2 + (X[:, 1] - 5) ** 2 - 82.81
+        ], axis=1)
 
     def set_xmin(self):
         self.xmin = np.array([13, 0])
@@ -0,0 +1,37 @@
+"""
+Benchmark of PSO (Particle objects) against ArrayPSO ((swarm_size, nvar) arrays) on the same problem and seed.
+
+Usage (from the repository root):
+    python -m benchmarks.pso [problem] [repeats]
+
+problem defaults to G1, the swarm size and number of generations are read from inputs/param_swarm.cfg (200 and 250).
+"""
+import sys
+import time
+import numpy as np
+from PSO import *
+
+
+def time_run(swarm_class, problem, repeats):
+    times = []
+    for seed in range(repeats):
+        optimizer = swarm_class(problem, seed=seed)
+        start_time = time.perf_counter()
+        optimizer.run()
+        times.append(time.perf_counter() - start_time)
+        optimizer.close()
+    return min(times), np.mean(times), optimizer.gbest.get_objective_value()
+
+
+def main():
+    problem = sys.argv[1] if len(sys.argv) > 1 else "G1"
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"PSO runs on {problem}, best / mean of {repeats} runs")
+    for swarm_class in (PSO, ArrayPSO):
+        best, mean, gbest = time_run(swarm_class, problem, repeats)
+        print(f"{swarm_class.__name__:10s} {best * 1000:10.2f} ms {mean * 1000:10.2f} ms   gbest {gbest:.6g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark of functions.stochastic_ranking_indices on a combined parent + offspring population.
+
+Usage (from the repository root):
+    python -m benchmarks.stochastic_ranking [pop_size] [repeats]
+
+pop_size defaults to 5000, so 2 x pop_size = 10k individuals are ranked.
+"""
+import sys
+import time
+import numpy as np
+from utils import *
+
+
+def time_ranking(fitness_values, constraint_violations, Pf, repeats, rng):
+    times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        functions.stochastic_ranking_indices(fitness_values, constraint_violations, Pf, rng=rng)
+        times.append(time.perf_counter() - start_time)
+    return min(times), np.mean(times)
+
+
+def main():
+    pop_size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    n = 2 * pop_size
+    rng = np.random.default_rng(0)
+
+    fitness_values = rng.standard_normal(n)
+    feasible = rng.random(n) < 0.5
+    mixed_violations = np.where(feasible, 0.0, rng.random(n))
+
+    cases = [
+        ("mixed feasibility, Pf=0.45 (sweeps)", fitness_values, mixed_violations, 0.45),
+        ("mixed feasibility, Pf=0 (fast path)", fitness_values, mixed_violations, 0.0),
+        ("all feasible, Pf=0.45 (fast path)", fitness_values, np.zeros(n), 0.45),
+    ]
+
+    print(f"stochastic ranking of 2 x pop_size = {n} individuals, best / mean of {repeats} runs")
+    for name, fitness, violations, Pf in cases:
+        best, mean = time_ranking(fitness, violations, Pf, repeats, rng)
+        print(f"{name:40s} {best * 1000:10.2f} ms {mean * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Runs a grid of problems x algorithms x seeds x config files over a pool of worker processes.
+
+Usage (from the repository root):
+    python -m experiments --problems G1 G4 G5 G6 --algorithms DE+SR GA --seeds 0:50 --results results/g_problems.jsonl
+
+Every finished run is appended to the results file as one JSON line; running the same command again skips the runs
+already recorded there. Load the records with experiments.load_results(path).
+"""
+import argparse
+from experiments import *
+
+
+def parse_seeds(values):
+    """
+    Seeds are given as integers or start:stop ranges (stop excluded)
+    """
+    seeds = []
+    for value in values:
+        if ":" in value:
+            start, stop = value.split(":")
+            seeds.extend(range(int(start), int(stop)))
+        else:
+            seeds.append(int(value))
+    return seeds
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m experiments", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--problems", nargs="+", required=True, help="problem names, e.g. G1 G6 Layeb10")
+    parser.add_argument("--algorithms", nargs="+", required=True, help="GA, DE, DE+SR, jDE, SHADE, L-SHADE (+SR) or PSO")
+    parser.add_argument("--seeds", nargs="+", default=["0:30"], help="integers or start:stop ranges (default 0:30)")
+    parser.add_argument("--configs", nargs="+", default=["inputs/params_{problem}.cfg"],
+                        help="population config files, {problem} is replaced by the lowercase problem name (layeb for Layeb*)")
+    parser.add_argument("--swarm-configs", nargs="+", default=["inputs/param_swarm.cfg"], help="config files of the PSO runs")
+    parser.add_argument("--n-var", type=int, default=None, help="number of variables of the scalable problems")
+    parser.add_argument("--population", choices=sorted(population_classes), default="array",
+                        help="ArrayPopulation (array) or Population (object), both give the same results")
+    parser.add_argument("--results", default="results.jsonl", help="JSON Lines file the runs are appended to")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every CPU)")
+    parser.add_argument("--timeout", type=float, default=None, help="per-run wall-clock limit in seconds")
+    parser.add_argument("--kill-grace", type=float, default=5.0,
+                        help="seconds a run may exceed --timeout before its worker is terminated")
+    parser.add_argument("--quiet", action="store_true", help="do not print a line per finished run")
+    args = parser.parse_args()
+
+    grid = ExperimentGrid(args.problems, args.algorithms, parse_seeds(args.seeds), args.configs, args.swarm_configs,
+                          n_var=args.n_var, population=args.population)
+    runner = ExperimentRunner(grid, args.results, n_workers=args.workers, timeout=args.timeout, kill_grace=args.kill_grace,
+                              verbose=not args.quiet)
+    try:
+        counts = runner.run()
+    except KeyboardInterrupt:
+        print(f"Interrupted, finished runs are kept in {args.results}: run the same command again to continue")
+        return
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "nothing to run")
+
+
+if __name__ == "__main__":
+    main()
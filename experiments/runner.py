@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import signal
+import itertools
+import collections
+import multiprocessing
+import multiprocessing.connection
+import numpy as np
+import pandas as pd
+from Problems import *
+from GA import *
+from PSO import *
+
+
+population_classes = {"array": ArrayPopulation, "object": Population}
+
+def cell_key(cell):
+    """
+    Identifies a cell of the grid in the results file
+    """
+    return json.dumps(cell, sort_keys=True)
+
+def config_name(problem):
+    """
+    Replaces "{problem}" in config file patterns: the lowercase problem name, or "layeb" for the Layeb problems, which
+    share inputs/params_layeb.cfg
+    """
+    return "layeb" if problem.lower().startswith("layeb") else problem.lower()
+
+
+class ExperimentGrid:
+    """
+    Cartesian product of problems x algorithms x seeds x config files. Every cell is one independent run.
+
+    Parameters:
+    - problems (list): names of problems in Problems/problems.py
+    - algorithms (list): evolve selections of Population ("GA", "DE", "DE+SR", "jDE", "SHADE", "L-SHADE", ...) or "PSO".
+                         Selections ending in "+SR" run without penalty in the fitness, the others with it
+    - seeds (list): integer seeds, each run owns a np.random.Generator seeded with its seed
+    - config_files (list): config files of the population runs, "{problem}" is replaced by the lowercase problem name
+                           or by "layeb" for the Layeb problems (e.g. "inputs/params_{problem}.cfg"), see config_name
+    - swarm_config_files (list): config files of the PSO runs, same placeholder
+    - n_var (int): number of variables of the scalable problems
+    - population (str): "array" (ArrayPopulation) or "object" (Population)
+    """
+    def __init__(self, problems, algorithms, seeds, config_files=("inputs/params_{problem}.cfg",),
+                 swarm_config_files=("inputs/param_swarm.cfg",), n_var=None, population="array"):
+        if population not in population_classes:
+            raise ValueError(f"population should be one of {list(population_classes)}")
+        self.problems = list(problems)
+        self.algorithms = list(algorithms)
+        self.seeds = [int(seed) for seed in seeds]
+        self.config_files = list(config_files)
+        self.swarm_config_files = list(swarm_config_files)
+        self.n_var = n_var
+        self.population = population
+
+    def cells(self):
+        for problem, algorithm in itertools.product(self.problems, self.algorithms):
+            config_files = self.swarm_config_files if algorithm == "PSO" else self.config_files
+            for config_file, seed in itertools.product(config_files, self.seeds):
+                yield {
+                    "problem": problem,
+                    "algorithm": algorithm,
+                    "seed": seed,
+                    "config_file": config_file.format(problem=config_name(problem)),
+                    "n_var": self.n_var,
+                    "population": None if algorithm == "PSO" else self.population
+                }
+
+    def validate(self):
+        """
+        Builds every problem once and checks that every config file exists, so a typo fails before any run starts
+        """
+        for problem in self.problems:
+            problems.FunctionFactory.select_function(problem, self.n_var)
+        missing = sorted({cell["config_file"] for cell in self.cells() if not os.path.isfile(cell["config_file"])})
+        if missing:
+            raise FileNotFoundError(f"Missing config files: {', '.join(missing)}")
+
+
+def run_cell(cell, time_limit=None):
+    """
+    Runs one cell of the grid and returns its record: stop reason, generations, evaluations, elapsed time, last row of
+    the generation statistics and best genes.
+
+    Parameters:
+    - time_limit (float): wall-clock limit in seconds, enforced through the max_time stopping rule so the run still
+                          returns its results
+    """
+    start_time = time.perf_counter()
+    n_var = {"n_var": cell["n_var"]} if cell["n_var"] is not None else {}
+    if cell["algorithm"] == "PSO":
+        optimizer = PSO(cell["problem"], config_file=cell["config_file"], seed=cell["seed"], **n_var)
+    else:
+        optimizer = population_classes[cell["population"]](cell["problem"], penalty=not cell["algorithm"].endswith("+SR"),
+                                                            config_file=cell["config_file"], seed=cell["seed"], **n_var)
+    if time_limit is not None:
+        stopping_criteria = optimizer.stopping_criteria
+        stopping_criteria.max_time = time_limit if stopping_criteria.max_time is None else min(stopping_criteria.max_time, time_limit)
+
+    try:
+        if cell["algorithm"] == "PSO":
+            optimizer.run()
+            best_genes = optimizer.gbest.get_x()
+        else:
+            optimizer.evolve(cell["algorithm"])
+            best_genes = optimizer.best_chromosome.genes
+    finally:
+        optimizer.close()
+
+    return {
+        "status": "ok",
+        "stop_reason": optimizer.stop_reason,
+        "generations": optimizer.generation_t,
+        "evaluations": int(optimizer.objective_function.evaluation_count),
+        "elapsed_time": time.perf_counter() - start_time,
+        "statistics": optimizer.generation_statistics.last(),
+        "best_genes": [float(gene) for gene in best_genes]
+    }
+
+
+def _initialize_worker():
+    """
+    Runs once when a worker process starts. Problems, config and optimizer are still built by every run (see run_cell),
+    since the problems count evaluations and hold the penalty schedule of their run
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl+C is handled by the runner, which terminates the workers
+
+def _experiment_worker(connection, time_limit):
+    """
+    Runs cells received through the pipe until it receives None, replying with the record of each one
+    """
+    _initialize_worker()
+    while True:
+        cell = connection.recv()
+        if cell is None:
+            connection.close()
+            return
+        try:
+            with np.errstate(over="ignore"): # overflow warnings of diverging individuals, one per run would flood the log
+                record = run_cell(cell, time_limit)
+        except Exception as error:
+            record = {"status": "error", "error": f"{type(error).__name__}: {error}"}
+        connection.send(record)
+
+
+class ResultsFile:
+    """
+    Append-only JSON Lines file with one record per finished run. Every record is flushed and synced to disk as soon as
+    it is written, and a line cut short by a crash is ignored when reading.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        if not os.path.isfile(self.path):
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def completed_keys(self):
+        """
+        Keys of the cells that do not have to run again: every recorded run except those that raised or whose worker crashed
+        """
+        return {cell_key(record["cell"]) for record in self.read() if record["status"] not in ("error", "crashed")}
+
+    def append(self, record):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+def load_results(path):
+    """
+    Returns the records of a results file as a DataFrame, the statistics are flattened into "statistics.<field>" columns
+    """
+    return pd.json_normalize(ResultsFile(path).read())
+
+
+class ExperimentRunner:
+    """
+    Schedules the cells of an ExperimentGrid over a pool of worker processes, each running one cell at a time.
+
+    Cells already in the results file are skipped, so an interrupted grid continues where it stopped. A run that exceeds
+    timeout seconds is first asked to stop through the max_time stopping rule; if it is still running kill_grace seconds
+    later its worker is terminated, the run is recorded as "timeout" and a new worker takes its place. A worker that dies
+    (e.g. killed by the system) is recorded as "crashed" and replaced. Cells recorded as "error" (the run raised) or
+    "crashed" run again on the next restart.
+
+    Parameters:
+    - grid (ExperimentGrid): cells to run
+    - results_path (str): JSON Lines file the records are appended to
+    - n_workers (int): number of worker processes, every CPU if None
+    - timeout (float): per-run wall-clock limit in seconds, None disables it
+    - kill_grace (float): seconds a run may exceed timeout before its worker is terminated
+    """
+    def __init__(self, grid, results_path, n_workers=None, timeout=None, kill_grace=5.0, verbose=True):
+        self.grid = grid
+        self.results = ResultsFile(results_path)
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.kill_grace = kill_grace
+        self.verbose = verbose
+        self.context = multiprocessing.get_context()
+
+    def start_worker(self):
+        parent_connection, child_connection = self.context.Pipe()
+        process = self.context.Process(target=_experiment_worker, args=(child_connection, self.timeout), daemon=True)
+        process.start()
+        child_connection.close() # the parent only keeps its end, so recv raises EOFError if the worker dies
+        return {"process": process, "connection": parent_connection, "cell": None, "start_time": None}
+
+    def stop_worker(self, worker, terminate=False):
+        if terminate:
+            worker["process"].terminate()
+        else:
+            try:
+                worker["connection"].send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        worker["process"].join()
+        worker["connection"].close()
+
+    def finish(self, worker, record):
+        """
+        Appends the record of the worker's cell to the results file and marks the worker as idle
+        """
+        record = {"cell": worker["cell"], **record}
+        self.results.append(record)
+        self.counts[record["status"]] += 1
+        if self.verbose:
+            cell = worker["cell"]
+            done = sum(self.counts.values())
+            detail = f"best_fitness={record['statistics']['best_fitness']:.6g}" if record["status"] == "ok" else record.get("error", "")
+            print(f"[{done}/{self.total}] {cell['problem']} {cell['algorithm']} seed={cell['seed']} {cell['config_file']} "
+                  f"{record['status']} {detail} {time.perf_counter() - worker['start_time']:.2f}s", flush=True)
+        worker["cell"], worker["start_time"] = None, None
+
+    def run(self):
+        """
+        Runs every cell missing from the results file, returns the number of records written per status
+        """
+        self.grid.validate()
+        completed = self.results.completed_keys()
+        pending = collections.deque(cell for cell in self.grid.cells() if cell_key(cell) not in completed)
+        self.total = len(pending)
+        self.counts = collections.Counter()
+        if self.verbose:
+            print(f"{self.total} runs to go, {len(completed)} already in {self.results.path}", flush=True)
+
+        workers = [self.start_worker() for _ in range(min(self.n_workers, self.total))]
+        try:
+            while pending or any(worker["cell"] is not None for worker in workers):
+                for worker in workers:
+                    if worker["cell"] is None and pending:
+                        worker["cell"], worker["start_time"] = pending.popleft(), time.perf_counter()
+                        worker["connection"].send(worker["cell"])
+
+                busy = [worker for worker in workers if worker["cell"] is not None]
+                ready = multiprocessing.connection.wait([worker["connection"] for worker in busy], timeout=1.0)
+                for i, worker in enumerate(workers):
+                    if worker["connection"] not in ready:
+                        continue
+                    try:
+                        self.finish(worker, worker["connection"].recv())
+                    except EOFError:
+                        self.stop_worker(worker, terminate=True)
+                        self.finish(worker, {"status": "crashed", "error": f"worker exited with code {worker['process'].exitcode}"})
+                        workers[i] = self.start_worker()
+
+                if self.timeout is not None:
+                    for i, worker in enumerate(workers):
+                        if worker["cell"] is not None and time.perf_counter() - worker["start_time"] > self.timeout + self.kill_grace:
+                            self.stop_worker(worker, terminate=True)
+                            self.finish(worker, {"status": "timeout", "error": f"still running after {self.timeout + self.kill_grace:g}s"})
+                            workers[i] = self.start_worker()
+        finally:
+            for worker in workers:
+                self.stop_worker(worker, terminate=worker["cell"] is not None)
+        return dict(self.counts)
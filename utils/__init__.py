@@ -1 +1,10 @@
-from .functions import *
\ No newline at end of file
+from .functions import *
+from .settings import *
+from .stopping import *
+from .statistics import *
+from .checkpoint import *
+from .constraint_handling import *
+from .restart import *
+from .run_control import *
+from .topology import *
+from .boundary_handling import *
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class BoundaryHandling:
+    """
+    What happens to the components of a particle that leave [xmin, xmax] after a PSO position update, applied to the
+    whole (swarm_size, nvar) swarm at once:
+    - "absorb": the component stops at the bound and its velocity is set to 0
+    - "reflect": the component bounces back into the domain by as much as it overshot and its velocity changes sign
+                 (still clipped to the bound if it overshot by more than the domain width)
+    - "random": the component is drawn again uniformly within the bounds, its velocity is kept
+    - "periodic": the domain wraps around, xmax continues at xmin
+    - "none": positions are not bounded
+
+    Settings are read from the optional [BoundarySettings] section of the config file.
+
+    Parameters:
+    - strategy (str): "absorb", "reflect", "random", "periodic" or "none"
+    """
+    strategies = ("absorb", "reflect", "random", "periodic", "none")
+
+    def __init__(self, strategy="absorb"):
+        if strategy not in self.strategies:
+            raise ValueError(f"Boundary handling strategy should be one of {self.strategies}, not {strategy}")
+        self.strategy = strategy
+
+    @classmethod
+    def from_config(cls, config, section="BoundarySettings"):
+        return cls(strategy=config.get(section, 'strategy', fallback='absorb'))
+
+    def apply(self, positions, velocities, xmin, xmax, rng=None):
+        """
+        Returns the (positions, velocities) arrays with every component back within [xmin, xmax]
+        """
+        if self.strategy == "none":
+            return positions, velocities
+        xmin, xmax = np.asarray(xmin, dtype=float), np.asarray(xmax, dtype=float)
+        below, above = positions < xmin, positions > xmax
+        outside = below | above
+        if not outside.any():
+            return positions, velocities
+
+        positions, velocities = positions.copy(), velocities.copy()
+        if self.strategy == "absorb":
+            positions = np.clip(positions, xmin, xmax)
+            velocities[outside] = 0.0
+        elif self.strategy == "reflect":
+            positions = np.where(below, 2 * xmin - positions, np.where(above, 2 * xmax - positions, positions))
+            positions = np.clip(positions, xmin, xmax)
+            velocities[outside] = -velocities[outside]
+        elif self.strategy == "random":
+            rng = np.random.default_rng(rng)
+            uniform = xmin + rng.random(positions.shape) * (xmax - xmin)
+            positions[outside] = uniform[outside]
+        elif self.strategy == "periodic":
+            positions = xmin + np.mod(positions - xmin, xmax - xmin)
+        return positions, velocities
@@ -0,0 +1,49 @@
+import os
+import json
+import numpy as np
+
+
+def save_npz(path, **arrays):
+    """
+    Writes the arrays to a compressed .npz file. The file is written next to path and then renamed, so an interrupted
+    save never corrupts the previous checkpoint.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(temporary_path, path)
+
+def load_npz(path):
+    """
+    Reads a checkpoint written by save_npz into a dict of arrays
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+def rng_state(rng):
+    """
+    Returns the state of a np.random.Generator as an array (its bit generator state, serialized to JSON)
+    """
+    return {"rng_state": np.array(json.dumps(rng.bit_generator.state))}
+
+def set_rng_state(rng, state):
+    """
+    Restores into rng the state returned by rng_state
+    """
+    rng.bit_generator.state = json.loads(str(state["rng_state"]))
+
+def prefixed(prefix, state):
+    """
+    Prefixes every key of a state dict, so several objects can share one .npz file
+    """
+    return {f"{prefix}_{key}": value for key, value in state.items()}
+
+def unprefixed(prefix, arrays):
+    """
+    Returns the entries of arrays written with prefixed(prefix, ...), without the prefix
+    """
+    start = len(prefix) + 1
+    return {key[start:]: value for key, value in arrays.items() if key.startswith(prefix + "_")}
@@ -0,0 +1,123 @@
+import numpy as np
+from . import functions
+
+
+class ConstraintHandling:
+    """
+    How Population selections and PSO best tracking compare individuals of a constrained problem:
+    - "penalty": by fitness, which includes the dynamic penalty of [PenaltySettings] (or by stochastic ranking)
+    - "feasibility": Deb's feasibility rules, lexicographically by the sum of constraint violations and then by fitness
+    - "epsilon": epsilon-constrained method (Takahama and Sakai), like "feasibility" but violations up to a level epsilon
+                 count as feasible. epsilon(t) = epsilon(0) * (1 - t / T_c) ** epsilon_cp until T_c and 0 afterwards,
+                 where epsilon(0) is the violation of the individual at the epsilon_theta quantile of the initial
+                 population and T_c = epsilon_tc * max_generations
+
+    Settings are read from the optional [ConstraintSettings] section of the config file.
+
+    Parameters:
+    - method (str): "penalty", "feasibility" or "epsilon"
+    - epsilon_theta (float): quantile of the initial violations used as epsilon(0)
+    - epsilon_cp (float): exponent of the epsilon schedule
+    - epsilon_tc (float): fraction of the run after which epsilon is 0
+    """
+    methods = ("penalty", "feasibility", "epsilon")
+
+    def __init__(self, method="penalty", epsilon_theta=0.2, epsilon_cp=5.0, epsilon_tc=0.2):
+        if method not in self.methods:
+            raise ValueError(f"Constraint handling method should be one of {self.methods}, not {method}")
+        self.method = method
+        self.epsilon_theta = epsilon_theta
+        self.epsilon_cp = epsilon_cp
+        self.epsilon_tc = epsilon_tc
+        self.initial_epsilon = 0.0
+        self.progress = 0.0
+        self.epsilon = 0.0
+
+    @classmethod
+    def from_config(cls, config, section="ConstraintSettings"):
+        return cls(method=config.get(section, 'method', fallback='penalty'),
+                   epsilon_theta=config.getfloat(section, 'epsilon_theta', fallback=0.2),
+                   epsilon_cp=config.getfloat(section, 'epsilon_cp', fallback=5.0),
+                   epsilon_tc=config.getfloat(section, 'epsilon_tc', fallback=0.2))
+
+    @property
+    def lexicographic(self):
+        """
+        True if individuals are compared by violation and fitness instead of by fitness alone
+        """
+        return self.method != "penalty"
+
+    def start(self, constraint_violations):
+        """
+        Sets epsilon(0) from the violations of the initial population, along the last axis for (n_runs, pop) arrays
+        """
+        if self.method == "epsilon":
+            self.initial_epsilon = np.quantile(constraint_violations, self.epsilon_theta, axis=-1, method="lower")
+            self.update(self.progress)
+
+    def update(self, progress):
+        """
+        Moves the epsilon level to the given fraction of the run
+        """
+        self.progress = progress
+        if self.method == "epsilon":
+            remaining = max(0.0, 1 - progress / self.epsilon_tc) if self.epsilon_tc > 0 else 0.0
+            self.epsilon = self.initial_epsilon * remaining ** self.epsilon_cp
+
+    def comparison_violation(self, constraint_violations):
+        """
+        Violations as they are compared: zero up to epsilon with the epsilon method, unchanged otherwise
+        """
+        if self.method == "epsilon":
+            return functions.epsilon_violation(constraint_violations, self.epsilon)
+        return constraint_violations
+
+    def order(self, fitness_values, constraint_violations):
+        """
+        Indices of the individuals from best to worst
+        """
+        if self.lexicographic:
+            return functions.lexicographic_order(fitness_values, self.comparison_violation(constraint_violations))
+        return np.argsort(fitness_values, kind='stable')
+
+    def best(self, fitness_values, constraint_violations):
+        """
+        Index of the best individual (the first one on ties)
+        """
+        if self.lexicographic:
+            return int(self.order(fitness_values, constraint_violations)[0])
+        return int(np.argmin(fitness_values))
+
+    def selection_values(self, fitness_values, constraint_violations):
+        """
+        Scalar per individual that selection operators minimize: the fitness itself, or its lexicographic rank
+        """
+        if self.lexicographic:
+            return functions.lexicographic_ranks(fitness_values, self.comparison_violation(constraint_violations))
+        return fitness_values
+
+    def less_equal(self, fitness_a, violation_a, fitness_b, violation_b):
+        """
+        Element-wise: True where a is at least as good as b
+        """
+        if self.lexicographic:
+            return functions.lexicographic_less_equal(fitness_a, self.comparison_violation(violation_a),
+                                                      fitness_b, self.comparison_violation(violation_b))
+        return fitness_a <= fitness_b
+
+    def less(self, fitness_a, violation_a, fitness_b, violation_b):
+        """
+        Element-wise: True where a is strictly better than b
+        """
+        if self.lexicographic:
+            violation_a, violation_b = self.comparison_violation(violation_a), self.comparison_violation(violation_b)
+            return (violation_a < violation_b) | ((violation_a == violation_b) & (fitness_a < fitness_b))
+        return fitness_a < fitness_b
+
+    def get_state(self):
+        return {"initial_epsilon": np.array(self.initial_epsilon), "progress": np.array(self.progress)}
+
+    def set_state(self, state):
+        initial_epsilon = state["initial_epsilon"]
+        self.initial_epsilon = float(initial_epsilon) if initial_epsilon.ndim == 0 else initial_epsilon.copy()
+        self.update(float(state["progress"]))
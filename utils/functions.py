@@ -1,45 +1,52 @@
 import sympy as sp
 import numpy as np
 import pandas as pd
-import random
 import matplotlib.pyplot as plt
 from scipy.stats import ranksums
 
 
-def spread_factor(u=None, nc=2):
+def spread_factor(u=None, nc=2, rng=None):
     """
     Computes the spread factor for Simulated Binary Crossover (SBX) given the u value
 
     Parameters:
-    - u (float): random u value from 0 to 1
+    - u (float or np.ndarray): random u value(s) from 0 to 1
     - nc (int): n_c value, n=0 uniform distribution, 2<n<5 matches closely the simulation for single-point crossover
+    - rng (np.random.Generator): random stream u is drawn from when not given
 
     Returns:
-    - beta (float)
+    - beta (float or np.ndarray, same shape as u)
     """
     if u is None:
-        u = random.random()
+        u = np.random.default_rng(rng).random()
 
-    if u <= 0.5:
-        beta = (2 * u) ** (1/(nc + 1))
-    else:
-        beta = (1/(2 * (1 - u))) ** (1/(nc + 1))
+    if np.ndim(u) == 0:
+        if u <= 0.5:
+            beta = (2 * u) ** (1/(nc + 1))
+        else:
+            beta = (1/(2 * (1 - u))) ** (1/(nc + 1))
+        return beta
+
+    u = np.asarray(u)
+    with np.errstate(divide='ignore'): # u == 1 only reaches the discarded branch
+        beta = np.where(u <= 0.5, (2 * u) ** (1/(nc + 1)), (1/(2 * (1 - u))) ** (1/(nc + 1)))
     return beta
 
-def beta_q_factor(delta, eta_m, u=None):
+def beta_q_factor(delta, eta_m, u=None, rng=None):
     """
     Computes the beta_q factor for parameter based mutation (PM)
 
     Parameters:
     - delta (float): value calculated with y parent solution, y upper and lower limits.
     - eta_m (float): 100 + generation number aka η_m
+    - rng (np.random.Generator): random stream u is drawn from when not given
     
     Returns:
     - Returns:
     - beta_q (float)
     """    
     if u is None:
-        u = np.random.rand(*delta.shape)
+        u = np.random.default_rng(rng).random(np.shape(delta))
     
     delta = np.clip(delta, 0, 1)
     delta_q = np.where(
@@ -50,7 +57,90 @@ def beta_q_factor(delta, eta_m, u=None):
 
     return delta_q
 
-def set_J(N, pc=0.8, binary=False):
+def sbx_and_pbm_random_numbers(pop_size, nvar, per_gene_spread=False, rng=None):
+    """
+    Draws, in a single block, the uniform numbers one generation of sbx_and_pbm needs: (crossover, spread, mutation) of
+    shapes (n_pairs,), (n_pairs, nvar or 1) and (pop_size, nvar)
+    """
+    n_pairs = (pop_size + 1) // 2
+    spread_size = nvar if per_gene_spread else 1
+    u = np.random.default_rng(rng).random(n_pairs * (1 + spread_size) + pop_size * nvar)
+    return (u[:n_pairs],
+            u[n_pairs:n_pairs * (1 + spread_size)].reshape(n_pairs, spread_size),
+            u[n_pairs * (1 + spread_size):].reshape(pop_size, nvar))
+
+def sbx_and_pbm(genes, xmin, xmax, t, crossover_rate, nc=2, per_gene_spread=False, random_numbers=None, rng=None):
+    """
+    Vectorized SBX (Simulated Binary Crossover) followed by PBM (Parameter-Based Mutation) over a whole population.
+
+    Consecutive rows are paired (row i with row i+1, the last row of an odd population with row 0), so genes are expected
+    to be shuffled already.
+
+    Parameters:
+    - genes (np.ndarray): (pop_size, nvar) parent genes, or (n_runs, pop_size, nvar) for several independent populations
+    - xmin, xmax (np.ndarray): problem bounds
+    - t (int): generation number, η_m = 100 + t
+    - crossover_rate (float): probability that a pair is crossed over instead of copied
+    - nc (int): n_c value of the spread factor
+    - per_gene_spread (bool): if True, every gene of a pair gets its own spread factor instead of one per pair
+    - random_numbers (tuple): optional (crossover, spread, mutation) uniform draws of shapes (..., n_pairs),
+                              (..., n_pairs, nvar or 1) and (..., pop_size, nvar), drawn from rng with
+                              sbx_and_pbm_random_numbers if not given
+    - rng (np.random.Generator): random stream
+
+    Returns:
+    - np.ndarray: offspring genes with the shape of genes, within bounds
+    """
+    pop_size, nvar = genes.shape[-2:]
+    parents1 = genes[..., 0::2, :]
+    parents2 = genes[..., np.arange(1, pop_size + 1, 2) % pop_size, :]
+
+    if random_numbers is None:
+        random_numbers = sbx_and_pbm_random_numbers(pop_size, nvar, per_gene_spread, rng)
+    u_crossover, u_spread, u_mutation = random_numbers
+    crossover = u_crossover < crossover_rate
+    b = spread_factor(u_spread, nc)
+
+    children1 = np.where(crossover[..., None], 0.5 * ((parents1 + parents2) - b * (parents2 - parents1)), parents1)
+    children2 = np.where(crossover[..., None], 0.5 * ((parents1 + parents2) + b * (parents2 - parents1)), parents2)
+    y = np.stack((children1, children2), axis=-2).reshape(*genes.shape[:-2], -1, nvar)[..., :pop_size, :]
+    y = np.clip(y, xmin, xmax)
+
+    delta_max = xmax - xmin
+    delta = np.minimum(y - xmin, xmax - y) / delta_max
+    beta_q = beta_q_factor(delta=delta, eta_m=100 + t, u=u_mutation)
+
+    return np.clip(y + beta_q * delta_max, xmin, xmax)
+
+def crossover_mask(pop_size, N, pc=0.8, binary=False, rng=None):
+    """
+    Generate the crossover mask of a whole population for binomial or binary crossover in one shot.
+
+    Parameters:
+    - pop_size (int): number of individuals.
+    - N (int): Length of the chromosome.
+    - pc (float or np.ndarray): Crossover probability for binomial crossover, a (pop_size, 1) array gives every individual
+                                its own probability.
+    - binary (bool): If True, use binary (single-point) crossover, every gene from a random j* to the end is taken from
+                     the trial vector. If False, use binomial crossover, every gene is taken with probability pc and a
+                     random j* is always taken.
+    - rng (np.random.Generator): random stream
+
+    Returns:
+    - np.ndarray: (pop_size, N) boolean mask, True where the gene comes from the trial vector.
+    """
+    rng = np.random.default_rng(rng)
+    if binary: # Single-point crossover
+        j_star = rng.integers(min(1, N - 1), N, size=pop_size)
+        mask = np.arange(N) >= j_star[:, None]
+    else: # Binomial crossover
+        j_star = rng.integers(0, N, size=pop_size)
+        mask = rng.random((pop_size, N)) < pc
+        mask[np.arange(pop_size), j_star] = True
+
+    return mask
+
+def set_J(N, pc=0.8, binary=False, rng=None):
     """
     Generate crossover points for binomial or binary crossover.
     
@@ -63,30 +153,61 @@ def set_J(N, pc=0.8, binary=False):
     Returns:
     - list: Indices selected for crossover.
     """
-    if binary: # Single-point crossover
-        j_star = np.random.randint(1, N)
-        J = set(range(j_star, N))  # Include all points from j_star to the end
-    else: # Binomial crossover
-        j_star = np.random.randint(0, N)
-        J = {j_star}
-        for j in range(N):
-            if j != j_star:
-                u = np.random.random()
-                if u < pc:
-                    J.add(j)
-    
-    return list(J)
+    return np.flatnonzero(crossover_mask(1, N, pc, binary, rng)[0]).tolist()
+
+def difference_indices(pop_size, rng=None):
+    """
+    Draws, for every individual i, the indices i2 and i3 of the DE difference vector x_i2 - x_i3, with i, i2 and i3 all
+    different. Invalid draws are drawn again until none is left.
+
+    Parameters:
+    - pop_size (int): number of individuals
+    - rng (np.random.Generator): random stream
+
+    Returns:
+    - tuple: (i2, i3) index vectors
+    """
+    rng = np.random.default_rng(rng)
+    idxs = np.arange(pop_size)
+    i2 = rng.integers(0, pop_size, size=pop_size)
+    i3 = rng.integers(0, pop_size, size=pop_size)
+
+    valid = (i2 != idxs) & (i3 != idxs) & (i2 != i3)
+    while not np.all(valid):
+        i2 = np.where(valid, i2, rng.integers(0, pop_size, size=pop_size))
+        i3 = np.where(valid, i3, rng.integers(0, pop_size, size=pop_size))
+        valid = (i2 != idxs) & (i3 != idxs) & (i2 != i3)
+
+    return i2, i3
+
+def genotypic_diversity(genes, xmin, xmax):
+    """
+    Cheap genotypic diversity measure of a population.
+
+    Parameters:
+    - genes (np.ndarray): (pop_size, nvar) genes, or (n_runs, pop_size, nvar) for several independent populations
+    - xmin, xmax (np.ndarray): problem bounds
+
+    Returns:
+    - float (np.ndarray of n_runs values for 3D genes): mean over the variables of the population standard deviation,
+      relative to the width of the domain
+    """
+    diversity = np.mean(np.std(genes, axis=-2) / (np.asarray(xmax) - np.asarray(xmin)), axis=-1)
+    return float(diversity) if np.ndim(diversity) == 0 else diversity
 
 def dict_to_dataframe(stats_dict):
     """
     Convert a dictionary of statistics to a pandas DataFrame.
 
     Parameters:
-    - stats_dict (dict): Dictionary where keys are generation numbers and values are dictionaries with fitness statistics.
+    - stats_dict (dict or GenerationStatistics): Dictionary where keys are generation numbers and values are dictionaries with fitness statistics.
 
     Returns:
     - pd.DataFrame: A DataFrame with 'Generation' as the index and columns for each statistic.
     """
+    if hasattr(stats_dict, 'to_dataframe'):
+        return stats_dict.to_dataframe()
+
     df = pd.DataFrame.from_dict(stats_dict, orient='index')
     
     df.index.name = 'Generation'
@@ -149,13 +270,145 @@ def compare_algorithms(results, p_value_threshold):
     
     return comparison_results
 
-def stochastic_ranking(population, Pf=0.45):
+def lexicographic_order(fitness_values, constraint_violations):
+    """
+    Indices that sort individuals by constraint violation first and fitness second, best first (Deb's feasibility rules:
+    feasible individuals come before infeasible ones and are ordered by fitness, infeasible ones by violation). Sorts
+    along the last axis, so (n_runs, pop) arrays are ordered run by run; ties keep their original order.
+    """
+    return np.lexsort((fitness_values, constraint_violations))
+
+def lexicographic_ranks(fitness_values, constraint_violations):
+    """
+    Position of every individual in lexicographic_order (0 for the best one)
+    """
+    order = lexicographic_order(fitness_values, constraint_violations)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.broadcast_to(np.arange(order.shape[-1]), order.shape), axis=-1)
+    return ranks
+
+def lexicographic_less_equal(fitness_a, violation_a, fitness_b, violation_b):
+    """
+    Element-wise Deb's comparison: True where individual a is at least as good as individual b
+    """
+    return (violation_a < violation_b) | ((violation_a == violation_b) & (fitness_a <= fitness_b))
+
+def epsilon_violation(constraint_violations, epsilon):
+    """
+    Constraint violation as seen by the epsilon-constrained method: violations up to epsilon count as feasible
+    """
+    return np.where(constraint_violations <= epsilon, 0.0, constraint_violations)
+
+def stochastic_ranking_indices(fitness_values, constraint_violations, Pf=0.45, max_sweeps=None, rng=None):
+    """
+    Stochastic ranking (Runarsson & Yao) on fitness and constraint violation vectors.
+
+    Adjacent individuals are compared by fitness when they have the same violation (e.g. both feasible) or with
+    probability Pf, otherwise by violation, and swapped if the first one loses. The bubble-sort passes are done as
+    odd-even transposition sweeps, so every comparison of a sweep is evaluated with array operations, and the ranking stops
+    as soon as a sweep makes no swap.
+    If every individual has the same violation, Pf is 0 or Pf is 1 the outcome is deterministic and a plain O(n log n)
+    sort is used instead.
+
+    Parameters:
+    - fitness_values (np.ndarray): fitness of every individual (penalty not included)
+    - constraint_violations (np.ndarray): constraint violation of every individual
+    - Pf: Probability of comparing based on fitness.
+    - max_sweeps (int): maximum number of sweeps, defaults to the number of individuals
+    - rng (np.random.Generator): random stream, the numbers of both halves of a sweep are drawn in one block
+
+    Returns:
+    - np.ndarray: indices of the individuals sorted by stochastic ranking.
+    """
+    rng = np.random.default_rng(rng)
+    fitness_values = np.array(fitness_values, dtype=float)
+    constraint_violations = np.array(constraint_violations, dtype=float)
+    n = len(fitness_values)
+
+    if n < 2:
+        return np.arange(n)
+    if Pf >= 1 or np.all(constraint_violations == constraint_violations[0]):
+        return np.argsort(fitness_values, kind='stable')
+    if Pf <= 0:
+        return np.lexsort((fitness_values, constraint_violations))
+
+    order = np.arange(n)
+    max_sweeps = n if max_sweeps is None else max_sweeps
+    for _ in range(max_sweeps):
+        swapped = False
+        u = rng.random((2, n // 2))
+        for start in (0, 1): # even pairs (0,1), (2,3)... then odd pairs (1,2), (3,4)...
+            phi_a, phi_b = constraint_violations[start:n - 1:2], constraint_violations[start + 1:n:2]
+            use_fitness = (phi_a == phi_b) | (u[start, :len(phi_a)] < Pf)
+            swap = np.where(use_fitness, fitness_values[start:n - 1:2] > fitness_values[start + 1:n:2], phi_a > phi_b)
+
+            ia = start + 2 * np.flatnonzero(swap)
+            if len(ia) > 0:
+                swapped = True
+                ib = ia + 1
+                fitness_values[ia], fitness_values[ib] = fitness_values[ib], fitness_values[ia]
+                constraint_violations[ia], constraint_violations[ib] = constraint_violations[ib], constraint_violations[ia]
+                order[ia], order[ib] = order[ib], order[ia]
+        if not swapped:
+            break
+
+    return order
+
+def stochastic_ranking_indices_batch(fitness_values, constraint_violations, Pf, rngs, max_sweeps=None):
+    """
+    Row-wise stochastic_ranking_indices of (n_runs, n) fitness and constraint violation arrays. Row r draws from
+    rngs[r] exactly as stochastic_ranking_indices would with that stream, so every row gets the same ranking,
+    but the comparisons and swaps of all the rows still sweeping are done together.
+
+    Returns:
+    - np.ndarray: (n_runs, n) indices of every row sorted by stochastic ranking.
+    """
+    fitness_values = np.array(fitness_values, dtype=float)
+    constraint_violations = np.array(constraint_violations, dtype=float)
+    n_runs, n = fitness_values.shape
+
+    order = np.tile(np.arange(n), (n_runs, 1))
+    if n < 2:
+        return order
+    if Pf >= 1:
+        return np.argsort(fitness_values, axis=1, kind='stable')
+    if Pf <= 0:
+        return np.array([np.lexsort((fitness_values[r], constraint_violations[r])) for r in range(n_runs)], dtype=int).reshape(n_runs, n)
+
+    same_violation = np.all(constraint_violations == constraint_violations[:, :1], axis=1)
+    order[same_violation] = np.argsort(fitness_values[same_violation], axis=1, kind='stable')
+    sweeping = ~same_violation
+    max_sweeps = n if max_sweeps is None else max_sweeps
+    for _ in range(max_sweeps):
+        if not np.any(sweeping):
+            break
+        rows = np.flatnonzero(sweeping)
+        swapped = np.zeros(len(rows), dtype=bool)
+        u = np.stack([rngs[row].random((2, n // 2)) for row in rows])
+        for start in (0, 1): # even pairs (0,1), (2,3)... then odd pairs (1,2), (3,4)...
+            a, b = slice(start, n - 1, 2), slice(start + 1, n, 2)
+            phi_a, phi_b = constraint_violations[rows, a], constraint_violations[rows, b]
+            fitness_a, fitness_b = fitness_values[rows, a], fitness_values[rows, b]
+            use_fitness = (phi_a == phi_b) | (u[:, start, :phi_a.shape[1]] < Pf)
+            swap = np.where(use_fitness, fitness_a > fitness_b, phi_a > phi_b)
+
+            swapped |= np.any(swap, axis=1)
+            for values in (fitness_values, constraint_violations, order):
+                values_a, values_b = values[rows, a], values[rows, b]
+                values[rows, a] = np.where(swap, values_b, values_a)
+                values[rows, b] = np.where(swap, values_a, values_b)
+        sweeping[rows] = swapped
+
+    return order
+
+def stochastic_ranking(population, Pf=0.45, rng=None):
     """
     Perform stochastic ranking on a population of Chromosome objects.
     
     Parameters:
     - population: List of Chromosome objects to be ranked. !! NOT CLASS POPULATION !!
     - Pf: Probability of comparing based on fitness.
+    - rng (np.random.Generator): random stream
     
     Returns:
     - sorted_population: List of Chromosome objects sorted by stochastic ranking.
@@ -163,11 +416,7 @@ def stochastic_ranking(population, Pf=0.45):
     fitness_values = np.array([ind.fitness for ind in population])
     constraint_violations = np.array([ind.constraint_violation for ind in population])
     
-    use_fitness = np.random.rand(len(population)) < Pf
-    
-    combined_score = np.where(use_fitness, fitness_values, constraint_violations)
-    
-    sorted_indices = np.argsort(combined_score)
+    sorted_indices = stochastic_ranking_indices(fitness_values, constraint_violations, Pf, rng=rng)
     
     sorted_population = [population[i] for i in sorted_indices]
     
@@ -0,0 +1,63 @@
+import numpy as np
+from .settings import read_optional
+
+
+class RestartStrategy:
+    """
+    IPOP-style restarts of Population.evolve and PSO.run: when the genotypic diversity of the population (see
+    functions.genotypic_diversity, recorded every generation) falls below min_diversity, the population is replaced by
+    a new random one pop_size_factor times larger, and the best individual found so far is kept. The restart count is
+    recorded in the "restarts" column of the generation statistics.
+
+    Settings are read from the optional [RestartSettings] section of the config file, restarts are disabled when
+    min_diversity is None.
+
+    Parameters:
+    - min_diversity (float): restart when the diversity falls below this value
+    - pop_size_factor (float): size of the new population relative to the current one (1 restarts with the same size)
+    - max_pop_size (int): upper bound of the population size, no bound if None
+    - max_restarts (int): maximum number of restarts, no limit if None. The default of 3 caps the growth of the
+      population at pop_size_factor ** 3 (8 times with the default factor of 2)
+    """
+    def __init__(self, min_diversity=None, pop_size_factor=2.0, max_pop_size=None, max_restarts=3):
+        self.min_diversity = min_diversity
+        self.pop_size_factor = pop_size_factor
+        self.max_pop_size = max_pop_size
+        self.max_restarts = max_restarts
+        self.restarts = 0
+
+    @classmethod
+    def from_config(cls, config, section="RestartSettings"):
+        """
+        Reads the optional restart section of a ConfigParser, missing or empty keys take their default
+        """
+        return cls(min_diversity=read_optional(config, section, "min_diversity", float),
+                   pop_size_factor=read_optional(config, section, "pop_size_factor", float, 2.0),
+                   max_pop_size=read_optional(config, section, "max_pop_size", int),
+                   max_restarts=read_optional(config, section, "max_restarts", int, 3))
+
+    @property
+    def exhausted(self):
+        """
+        True if no more restarts will happen, the diversity_collapse stopping rule only applies then
+        """
+        return self.min_diversity is None or (self.max_restarts is not None and self.restarts >= self.max_restarts)
+
+    def check(self, diversity):
+        """
+        Returns True, and counts the restart, if the population should restart given its last recorded diversity
+        """
+        if self.exhausted or diversity is None or not diversity < self.min_diversity:
+            return False
+        self.restarts += 1
+        return True
+
+    def next_pop_size(self, pop_size):
+        new_size = max(pop_size, int(round(pop_size * self.pop_size_factor)))
+        return new_size if self.max_pop_size is None else min(new_size, max(self.max_pop_size, pop_size))
+
+    def get_state(self):
+        return {"restarts": np.array(self.restarts)}
+
+    def set_state(self, state):
+        self.restarts = int(state["restarts"])
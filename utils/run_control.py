@@ -0,0 +1,37 @@
+class RunControl:
+    """
+    Mixin of Population and PSO with the checks made after every generation and the statistics and cache reports. Uses
+    the generation_statistics, stopping_criteria, restart_strategy and objective_function attributes of the run, and
+    its restart method.
+    """
+    def get_population_statistics(self):
+        """
+        Returns the GenerationStatistics of the run (indexable by generation, see also to_dataframe and last)
+        """
+        return self.generation_statistics
+
+    def check_stopping_criteria(self):
+        """
+        Returns the reason to stop after the last recorded generation, or None to continue. A diversity collapse only
+        stops the run once no restarts are left
+        """
+        diversity = self.generation_statistics.last("diversity") if self.restart_strategy.exhausted else None
+        return self.stopping_criteria.check(self.generation_statistics.last("best_fitness"), self.generation_statistics.last("num_violations"),
+                                            self.objective_function.evaluation_count, diversity)
+
+    def check_restart(self):
+        """
+        Restarts the population or swarm if its last recorded diversity fell below the threshold of [RestartSettings],
+        returns True if it did
+        """
+        if self.restart_strategy.check(self.generation_statistics.last("diversity")):
+            self.restart()
+            return True
+        return False
+
+    def get_cache_statistics(self):
+        """
+        Returns hits, misses and size of the evaluation cache, or None if it is disabled
+        """
+        cache = getattr(self.objective_function, "cache", None) # only set by CachedObjectiveFunction
+        return cache.get_statistics() if cache is not None else None
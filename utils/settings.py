@@ -0,0 +1,6 @@
+def read_optional(config, section, key, cast, default=None):
+    """
+    Reads an optional setting of a ConfigParser, returns default if the section or the key is missing or empty
+    """
+    value = config.get(section, key, fallback="").strip()
+    return cast(value) if value != "" else default
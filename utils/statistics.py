@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+
+class GenerationStatistics:
+    """
+    Columnar per-generation statistics stored in a preallocated NumPy structured array.
+
+    With ring_size > 0 only the last ring_size generations are kept (ring buffer for very long runs), otherwise the array
+    grows by doubling when the preallocated capacity is exceeded. Final values are available in O(1) through last(), and a
+    DataFrame is only built on request with to_dataframe(). Indexing by generation number returns a dict, as the old
+    dict-of-dicts statistics did.
+
+    Parameters:
+    - fields (list): (name, dtype) of every recorded column, a "generation" column is always added first
+    - capacity (int): number of generations to preallocate
+    - ring_size (int): if > 0, keep only the last ring_size generations
+    """
+    def __init__(self, fields, capacity=256, ring_size=0):
+        self.dtype = np.dtype([("generation", np.int64)] + [(name, dtype) for name, dtype in fields])
+        self.ring_size = ring_size
+        self.data = np.zeros(ring_size if ring_size > 0 else max(capacity, 1), dtype=self.dtype)
+        self.count = 0 # generations recorded so far, including the ones overwritten in ring mode
+        self.stop_reason = None
+
+    @property
+    def fields(self):
+        return self.dtype.names[1:]
+
+    def __len__(self):
+        return min(self.count, len(self.data))
+
+    def _row(self, position):
+        """
+        Index in data of the position-th stored row (0 = oldest kept)
+        """
+        if self.ring_size > 0 and self.count > self.ring_size:
+            return (self.count + position) % self.ring_size
+        return position
+
+    def record(self, generation, **values):
+        if self.ring_size > 0:
+            index = self.count % self.ring_size
+        else:
+            index = self.count
+            if index >= len(self.data):
+                self.data = np.concatenate((self.data, np.zeros(len(self.data), dtype=self.dtype)))
+        row = self.data[index]
+        row["generation"] = generation
+        for name, value in values.items():
+            row[name] = value
+        self.count += 1
+
+    def as_array(self):
+        """
+        Returns the stored rows in generation order as a structured array
+        """
+        if self.ring_size > 0 and self.count > self.ring_size:
+            return np.roll(self.data, -(self.count % self.ring_size))
+        return self.data[:self.count]
+
+    def column(self, name):
+        return self.as_array()[name]
+
+    def last(self, name=None):
+        """
+        Value of a field in the last recorded generation, or the whole last row as a dict if name is None
+        """
+        row = self.data[self._row(len(self) - 1)]
+        if name is None:
+            return {field: row[field].item() for field in self.fields}
+        return row[name].item()
+
+    def __contains__(self, generation):
+        return len(self) > 0 and generation in self.column("generation")
+
+    def __getitem__(self, generation):
+        rows = self.as_array()
+        matches = np.flatnonzero(rows["generation"] == generation)
+        if len(matches) == 0:
+            raise KeyError(generation)
+        row = rows[matches[-1]]
+        return {field: row[field].item() for field in self.fields}
+
+    def keys(self):
+        return self.column("generation").tolist()
+
+    def items(self):
+        return [(generation, self[generation]) for generation in self.keys()]
+
+    def get_state(self):
+        """
+        Returns the stored rows and counters as arrays (see utils/checkpoint.py)
+        """
+        return {"data": self.data, "count": np.array(self.count), "stop_reason": np.array(self.stop_reason or "")}
+
+    def set_state(self, state):
+        self.data = state["data"].astype(self.dtype)
+        self.count = int(state["count"])
+        self.stop_reason = str(state["stop_reason"]) or None
+
+    def to_dataframe(self):
+        rows = self.as_array()
+        df = pd.DataFrame({field: rows[field] for field in self.fields}, index=pd.Index(rows["generation"], name="Generation"))
+        df.attrs["stop_reason"] = self.stop_reason
+        return df
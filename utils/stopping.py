@@ -0,0 +1,90 @@
+import time
+import numpy as np
+from .settings import read_optional
+
+
+class StoppingCriteria:
+    """
+    Stopping rules checked after every generation of Population.evolve and PSO.run, on top of max_generations.
+    Every rule is disabled when its value is None.
+
+    Parameters:
+    - max_evaluations (int): maximum number of function evaluations (checked after each generation, so the last one may
+                             overshoot the budget)
+    - target_fitness (float): stop once a feasible best fitness <= target_fitness + target_tolerance is found
+    - target_tolerance (float): tolerance for target_fitness
+    - stagnation_generations (int): stop if the best fitness so far has not improved by more than stagnation_tolerance
+                                    in this many generations
+    - stagnation_tolerance (float): minimum improvement that resets the stagnation window
+    - min_diversity (float): stop if the genotypic diversity (see functions.genotypic_diversity) falls below this value
+    - max_time (float): wall-clock limit in seconds
+    """
+    def __init__(self, max_evaluations=None, target_fitness=None, target_tolerance=1e-8, stagnation_generations=None,
+                 stagnation_tolerance=0.0, min_diversity=None, max_time=None):
+        self.max_evaluations = max_evaluations
+        self.target_fitness = target_fitness
+        self.target_tolerance = target_tolerance
+        self.stagnation_generations = stagnation_generations
+        self.stagnation_tolerance = stagnation_tolerance
+        self.min_diversity = min_diversity
+        self.max_time = max_time
+        self.start()
+
+    @classmethod
+    def from_config(cls, config, section="StoppingSettings"):
+        """
+        Reads the optional stopping section of a ConfigParser, missing or empty keys disable the rule
+        """
+        return cls(max_evaluations=read_optional(config, section, "max_evaluations", int),
+                   target_fitness=read_optional(config, section, "target_fitness", float),
+                   target_tolerance=read_optional(config, section, "target_tolerance", float, 1e-8),
+                   stagnation_generations=read_optional(config, section, "stagnation_generations", int),
+                   stagnation_tolerance=read_optional(config, section, "stagnation_tolerance", float, 0.0),
+                   min_diversity=read_optional(config, section, "min_diversity", float),
+                   max_time=read_optional(config, section, "max_time", float))
+
+    def start(self):
+        """
+        Resets the wall clock and the stagnation window, called at the beginning of every run
+        """
+        self.start_time = time.perf_counter()
+        self.best_so_far = np.inf
+        self.generations_without_improvement = 0
+
+    def get_state(self):
+        """
+        Returns the stagnation window and the elapsed time as arrays, so a resumed run keeps counting from there
+        """
+        return {
+            "elapsed_time": np.array(time.perf_counter() - self.start_time),
+            "best_so_far": np.array(self.best_so_far),
+            "generations_without_improvement": np.array(self.generations_without_improvement)
+        }
+
+    def set_state(self, state):
+        self.start_time = time.perf_counter() - float(state["elapsed_time"])
+        self.best_so_far = float(state["best_so_far"])
+        self.generations_without_improvement = int(state["generations_without_improvement"])
+
+    def check(self, best_fitness, num_violations, evaluations, diversity=None):
+        """
+        Returns the reason for stopping ("max_evaluations", "target_fitness", "stagnation", "diversity_collapse",
+        "max_time") or None to continue.
+        """
+        if best_fitness < self.best_so_far - self.stagnation_tolerance:
+            self.best_so_far = best_fitness
+            self.generations_without_improvement = 0
+        else:
+            self.generations_without_improvement += 1
+
+        if self.target_fitness is not None and num_violations == 0 and best_fitness <= self.target_fitness + self.target_tolerance:
+            return "target_fitness"
+        if self.max_evaluations is not None and evaluations >= self.max_evaluations:
+            return "max_evaluations"
+        if self.stagnation_generations is not None and self.generations_without_improvement >= self.stagnation_generations:
+            return "stagnation"
+        if self.min_diversity is not None and diversity is not None and diversity < self.min_diversity:
+            return "diversity_collapse"
+        if self.max_time is not None and time.perf_counter() - self.start_time >= self.max_time:
+            return "max_time"
+        return None
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class Topology:
+    """
+    Neighborhood topology of PSO: which personal bests attract every particle through the social component.
+    - "global": every particle is attracted by the global best (gbest PSO)
+    - "ring": particle i by the best of particles i - ring_radius, ..., i + ring_radius (indices wrap around)
+    - "von_neumann": particle i by the best of itself and its 4 neighbors on a grid of ceil(sqrt(swarm_size)) columns
+                     wrapped around the swarm: i - 1, i + 1, i - columns, i + columns
+    - "random": particle i by the best of itself and random_k particles drawn uniformly (adaptive random topology of
+                SPSO 2007), drawn again after every iteration in which the global best did not improve
+
+    The neighbors of every particle are precomputed as a (swarm_size, neighborhood_size) index array, so the
+    neighborhood bests of the whole swarm are one gather and one argmin per iteration.
+
+    Settings are read from the optional [TopologySettings] section of the config file.
+
+    Parameters:
+    - topology (str): "global", "ring", "von_neumann" or "random"
+    - ring_radius (int): neighbors on each side of a particle in the ring
+    - random_k (int): random neighbors of a particle in the random topology
+    """
+    topologies = ("global", "ring", "von_neumann", "random")
+
+    def __init__(self, topology="global", ring_radius=1, random_k=3):
+        if topology not in self.topologies:
+            raise ValueError(f"Topology should be one of {self.topologies}, not {topology}")
+        self.topology = topology
+        self.ring_radius = ring_radius
+        self.random_k = random_k
+        self.neighbors = None
+
+    @classmethod
+    def from_config(cls, config, section="TopologySettings"):
+        return cls(topology=config.get(section, 'topology', fallback='global'),
+                   ring_radius=config.getint(section, 'ring_radius', fallback=1),
+                   random_k=config.getint(section, 'random_k', fallback=3))
+
+    @property
+    def local(self):
+        """
+        True if particles are attracted by neighborhood bests instead of the global best
+        """
+        return self.topology != "global"
+
+    def build(self, swarm_size, rng=None):
+        """
+        Precomputes the neighbor indices of a swarm of swarm_size particles (None for the global topology)
+        """
+        indices = np.arange(swarm_size)[:, None]
+        if self.topology == "ring":
+            offsets = np.arange(-self.ring_radius, self.ring_radius + 1)
+            self.neighbors = (indices + offsets) % swarm_size
+        elif self.topology == "von_neumann":
+            columns = int(np.ceil(np.sqrt(swarm_size)))
+            offsets = np.array([0, -1, 1, -columns, columns])
+            self.neighbors = (indices + offsets) % swarm_size
+        elif self.topology == "random":
+            rng = np.random.default_rng(rng)
+            self.neighbors = np.hstack([indices, rng.integers(swarm_size, size=(swarm_size, self.random_k))])
+        else:
+            self.neighbors = None
+        return self.neighbors
+
+    def update(self, improved, rng=None):
+        """
+        Called once per iteration with whether the global best improved, draws the random topology again if it did not
+        """
+        if self.topology == "random" and not improved:
+            self.build(len(self.neighbors), rng)
+
+    def neighborhood_bests(self, selection_values):
+        """
+        Index of the best personal best in the neighborhood of every particle, given the scalar that is minimized for
+        every personal best (see ConstraintHandling.selection_values)
+        """
+        neighborhood_values = selection_values[self.neighbors]
+        return np.take_along_axis(self.neighbors, np.argmin(neighborhood_values, axis=1)[:, None], axis=1)[:, 0]
+
+    def get_state(self):
+        return {"neighbors": np.empty((0, 0), dtype=int) if self.neighbors is None else self.neighbors}
+
+    def set_state(self, state):
+        self.neighbors = state["neighbors"].copy() if state["neighbors"].size > 0 else None